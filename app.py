@@ -1,38 +1,81 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.express as px
-from streamlit_gsheets import GSheetsConnection
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta
 import time
-import textwrap
+import threading
+import json
+import os
+import logging
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
 import numpy as np
-import pytz
+import schedule_core
+from schedule_core import (
+    KST, FONT_SIZE_TEXT, GANTT_WINDOW_STEP, GANTT_VIEW_BEFORE, GANTT_VIEW_AFTER, GANTT_ROW_OPTIONS,
+    get_now_kst, get_business_days, add_business_days,
+    process_dataframe, to_sheet_frame, apply_editor_changes, merge_change_set, reschedule, frame_hash, as_plain_labels, TaskIntervalIndex,
+    apply_schema, WorkloadMatrix, WORKLOAD_DAYS_BEFORE, WORKLOAD_DAYS_AFTER, VocabularyIndex, DependencyIndex,
+    ARCHIVE_AFTER_DAYS, archivable, archive_batches, TaskFilterIndex, EDITOR_PAGE_SIZES,
+    refresh_remaining, derived_mismatches, SHEET_COLUMNS,
+)
+from storage import storage_config, make_backend, read_archives, WriteBehindQueue
 
 # -----------------------------------------------------------------------------
 # 1. 초기 설정 및 라이브러리 로드
 # -----------------------------------------------------------------------------
-try:
-    import holidays
-    kr_holidays = holidays.KR()
-except ImportError:
-    kr_holidays = {}
-
-KST = pytz.timezone('Asia/Seoul')
-
-def get_now_kst():
-    return datetime.now(KST).replace(tzinfo=None)
-
 st.set_page_config(page_title="디자인1본부 1팀 일정", layout="wide", page_icon="📅")
 
+PERF_WINDOW = 200  # 단계별로 보관하는 최근 측정 수
+PERF_LOG = os.environ.get("SCHEDULE_PERF_LOG") == "1"  # 1 이면 측정마다 JSON 로그 한 줄 기록
+perf_logger = logging.getLogger("schedule.perf")
+if PERF_LOG and not perf_logger.handlers:  # 스크립트는 재실행마다 다시 돌므로 처음 한 번만 연결
+    # 루트 로거는 기본 WARNING 이라 INFO 가 버려지므로 전용 핸들러로 stderr 에 바로 남긴다
+    perf_logger.setLevel(logging.INFO)
+    perf_logger.addHandler(logging.StreamHandler())
+    perf_logger.propagate = False
+VERIFY_DERIVED = os.environ.get("SCHEDULE_VERIFY_DERIVED") == "1"  # 1 이면 부분 갱신한 파생 컬럼을 전체 재계산과 대조
+verify_logger = logging.getLogger("schedule.verify")
+
+class PerfStats:
+    """단계별 소요 시간 기록 (프로세스 공용). 단계마다 최근 PERF_WINDOW 개로 p50/p95 를 계산한다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=PERF_WINDOW))
+
+    @contextmanager
+    def span(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000)
+
+    def record(self, name, ms):
+        with self._lock:
+            self._samples[name].append(ms)
+        if PERF_LOG:
+            perf_logger.info(json.dumps({"span": name, "ms": round(ms, 2), "ts": time.time()}))
+
+    def summary(self):
+        with self._lock:
+            samples = {name: np.array(values) for name, values in self._samples.items()}
+        return pd.DataFrame([
+            {"단계": name, "횟수": len(v), "최근(ms)": v[-1], "p50(ms)": np.percentile(v, 50), "p95(ms)": np.percentile(v, 95)}
+            for name, v in sorted(samples.items())
+        ])
+
+@st.cache_resource
+def get_perf():
+    return PerfStats()
+
+perf = get_perf()
+rerun_started = time.perf_counter()
+
 # -----------------------------------------------------------------------------
 # 2. CSS 스타일링 (인쇄 너비 강제 맞춤 및 방향 자유 설정)
 # -----------------------------------------------------------------------------
-FONT_SIZE_TITLE = 18
-FONT_SIZE_TEXT = 10
-FONT_SIZE_DATE = 8
-
 custom_css = f"""
 <style>
     /* 폰트 통일 */
@@ -156,278 +199,525 @@ st.markdown('<div class="title-text">📅 디자인1본부 1팀 일정</div>', u
 # -----------------------------------------------------------------------------
 # 3. 유틸리티 및 데이터 로드
 # -----------------------------------------------------------------------------
-def is_holiday(date_obj):
-    if date_obj.weekday() >= 5: return True
-    if date_obj.strftime("%Y-%m-%d") in kr_holidays: return True
-    return False
-
-def get_business_days(start_date, end_date):
-    if pd.isna(start_date) or pd.isna(end_date): return 0
-    s = np.datetime64(start_date, 'D')
-    e = np.datetime64(end_date, 'D')
-    if s > e: return 0
-    holidays_list = list(kr_holidays.keys()) if kr_holidays else []
-    count = np.busday_count(s, e + 1, weekmask='1111100', holidays=holidays_list)
-    return int(count)
-
-def add_business_days(start_date, days):
-    if pd.isna(start_date) or days <= 0: return start_date
-    s = np.datetime64(start_date, 'D')
-    holidays_list = list(kr_holidays.keys()) if kr_holidays else []
-    try:
-        target = np.busday_offset(s, int(days) - 1, roll='forward', weekmask='1111100', holidays=holidays_list)
-        return pd.to_datetime(target).date()
-    except:
-        return start_date
-
-conn = st.connection("gsheets", type=GSheetsConnection)
+def get_conn():
+    """구글 시트 연결. streamlit_gsheets 는 import 가 무거워 시트에 실제로 접근할 때 불러온다 (연결 객체는 st.connection 이 캐시)."""
+    from streamlit_gsheets import GSheetsConnection
+    return st.connection("gsheets", type=GSheetsConnection)
 
-@st.cache_data(ttl=60)
 def load_data_from_sheet():
     try:
-        return conn.read(worksheet="Sheet1")
+        return get_sheet_cache().get()
     except Exception as e:
-        st.error(f"구글 시트 연결 오류: {e}")
+        st.error(f"데이터 저장소 연결 오류: {e}")
         return pd.DataFrame()
 
-def process_dataframe(df):
-    required_cols = ["프로젝트명", "구분", "담당자", "Activity", "작업기간", "시작일", "종료일", "진행률", "_original_id"]
-    if df.empty:
-        df = pd.DataFrame(columns=required_cols)
-    else:
-        for col in required_cols:
-            if col not in df.columns: df[col] = ""
-
-    df["시작일"] = pd.to_datetime(df["시작일"], errors='coerce')
-    df["종료일"] = pd.to_datetime(df["종료일"], errors='coerce')
-    
-    now_kst = get_now_kst()
-    today_naive = pd.to_datetime(now_kst.date())
-    df["남은기간"] = (df["종료일"] - today_naive).dt.days.fillna(0).astype(int)
-
-    if "진행률" in df.columns and df["진행률"].dtype == 'object':
-        df["진행률"] = df["진행률"].astype(str).str.replace('%', '')
-    df["진행률"] = pd.to_numeric(df["진행률"], errors='coerce').fillna(0).astype(int)
-    
-    df["작업기간"] = df.apply(
-        lambda x: get_business_days(x["시작일"], x["종료일"]) if pd.notna(x["시작일"]) and pd.notna(x["종료일"]) else 0, 
-        axis=1
-    )
-    df["진행상황"] = df["진행률"]
-    
-    # [중요] _original_id 오류 수정 로직
-    # 1. 숫자로 변환 (실패시 NaN)
-    df["_original_id"] = pd.to_numeric(df["_original_id"], errors='coerce')
-    
-    # 2. NaN 채우기 및 신규 ID 할당
-    if df["_original_id"].isnull().all():
-         df["_original_id"] = range(len(df))
-    else:
-        mask = df["_original_id"].isna()
-        valid_ids = df["_original_id"].dropna()
-        start_id = int(valid_ids.max()) + 1 if not valid_ids.empty else 0
-        df.loc[mask, "_original_id"] = range(start_id, start_id + mask.sum())
-
-    return df
-
-if 'data' not in st.session_state:
-    raw_data = load_data_from_sheet()
-    st.session_state['data'] = process_dataframe(raw_data)
-    if 'show_completed' not in st.session_state: st.session_state['show_completed'] = False
-
-data = st.session_state['data'].copy()
+@st.cache_resource
+def get_storage():
+    """설정(.streamlit/secrets.toml 의 [storage] 또는 SCHEDULE_STORAGE 환경변수)에 따른 저장소."""
+    try:
+        secrets = st.secrets.get("storage", {})
+    except Exception:
+        secrets = {}  # secrets.toml 이 없으면 기본값(구글 시트)
+    return make_backend(storage_config(secrets), get_conn)
+
+SNAPSHOT_DIR = Path(__file__).parent / ".cache"
+REVALIDATE_SECONDS = 60
+
+class SheetCache:
+    """저장소의 마지막 데이터를 디스크(Parquet)에 보관하는 프로세스 공용 스냅샷.
+
+    시작 직후에도 디스크 스냅샷을 바로 돌려주고, REVALIDATE_SECONDS 보다 오래되었으면 백그라운드에서
+    저장소를 다시 읽어 내용 해시가 달라졌을 때만 교체한다. 저장된 형태는 to_sheet_frame 결과이다.
+    hash 는 정본이 어느 내용에서 왔는지 가리키는 표식이다. 앱 안의 저장은 stage() 로 메모리 표식만 바꾸고,
+    기록 스레드가 기록을 마친 뒤 put(..., token) 으로 같은 표식에 실제 내용을 채운다 (해시/디스크 저장도 그때).
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.path = SNAPSHOT_DIR / f"{storage.snapshot_name}.parquet"
+        self.meta_path = SNAPSHOT_DIR / f"{storage.snapshot_name}.json"
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.writer = None  # 지연 기록 대기열 (get_writer 가 연결)
+        self.archive = None  # 보관분 (ID 가 빈 행에 새 ID 를 매길 때 하한용, get_sheet_cache 가 연결)
+        self.df, self.hash, self.fetched_at = None, None, None
+        self.content_hash = None  # self.df 의 내용 해시 (다시 읽은 내용이 바뀌었는지 판단용)
+        self.processed = (None, None)  # (hash, 저장소에서 읽어 이미 처리한 프레임) — 정본이 같은 처리를 되풀이하지 않도록
+        self._staged = 0
+        self.stats = {"hits": 0, "misses": 0, "swaps": 0, "last_error": None}
+        try:
+            meta = json.loads(self.meta_path.read_text())
+            self.df = pd.read_parquet(self.path)
+            self.hash = self.content_hash = meta["hash"]
+            self.fetched_at = meta["fetched_at"]
+        except Exception:
+            self.df = None  # 스냅샷이 없거나 손상됨 → 첫 요청 때 시트에서 읽음
+
+    def age(self):
+        return time.time() - self.fetched_at if self.fetched_at else None
+
+    def get(self):
+        if self.df is None:
+            self.stats["misses"] += 1
+            self.revalidate()
+        else:
+            self.stats["hits"] += 1
+            if self.age() > REVALIDATE_SECONDS: self.revalidate_in_background()
+        return self.df  # 읽기 전용으로 사용
+
+    def revalidate(self):
+        writer = self.writer
+        generation = writer.generation if writer else None
+        with perf.span("sheet.read"):
+            raw = self.storage.read()
+        if self._outdated(generation): return
+        with perf.span("sheet.process"):
+            # 시트에 직접 입력해 ID 가 빈 행이 있을 때만 보관분의 최대 ID 를 확인
+            blank_ids = "_original_id" not in raw or pd.to_numeric(raw["_original_id"], errors='coerce').isna().any()
+            min_id = self.archive.id_floor() if blank_ids and self.archive else 0
+            processed = process_dataframe(raw, min_id=min_id)
+            sheet_df = to_sheet_frame(processed)
+            # 시트의 다른 열은 버리고 sheet_df 를 다시 처리했을 때와 같은 열 순서로 맞춤
+            self.put(sheet_df, generation=generation, processed=processed[SHEET_COLUMNS + ["남은기간"]].reset_index(drop=True))
+
+    def _outdated(self, generation):
+        """아직 기록되지 않은 저장이 있거나 읽는 사이 기록이 일어났으면 읽은 내용이 최신이 아님 (스냅샷이 없을 때는 그래도 씀)."""
+        writer = self.writer
+        return writer is not None and (writer.depth or writer.generation != generation) and self.df is not None
+
+    def revalidate_in_background(self):
+        with self._lock:
+            if self._refreshing: return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.stats["last_error"] = None  # put 이 남기는 스냅샷 저장 실패는 지우지 않도록 먼저 비움
+                self.revalidate()
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+            finally:
+                self._refreshing = False
+        threading.Thread(target=run, daemon=True).start()
+
+    @contextmanager
+    def stage(self):
+        """앱 안의 저장으로 정본이 바뀌었음을 표시하고 새 표식을 넘긴다 (해시/디스크 저장 없음).
+        with 블록(대기열 등록) 동안 잠금을 쥐어 그사이 put 이 끼어들지 않게 한다.
+        df 는 기록이 끝나 put(..., 표식) 이 올 때까지 이전 내용이다 — 표식이 같은 정본은 df 를 읽지 않는다."""
+        with self._lock:
+            self._staged += 1
+            self.hash = f"staged-{id(self)}-{self._staged}"
+            self.fetched_at = time.time()
+            yield self.hash
+
+    def put(self, sheet_df, token=None, generation=None, processed=None):
+        """저장소에서 읽었거나(token 없음) 기록을 마친(token = stage 표식) 시트 프레임으로 스냅샷을 갱신.
+        generation: 읽기 시작할 때의 대기열 세대 — 그사이 저장이 있었으면 읽은 내용을 버린다.
+        processed: sheet_df 를 만든 process_dataframe 결과 (있으면 정본이 다시 처리하지 않고 씀)."""
+        new_hash = frame_hash(sheet_df)
+        with self._lock:
+            if token is not None and token != self.hash: return  # 그사이 더 새 저장이 있음 — 그 기록이 끝나면 다시 옴
+            if generation is not None and self._outdated(generation): return
+            changed = new_hash != self.content_hash
+            if changed:
+                self.df, self.content_hash = sheet_df.copy(), new_hash
+                self.hash = token or new_hash
+                self.processed = (self.hash, processed)
+                self.stats["swaps"] += 1
+            self.fetched_at = time.time()
+            try:
+                SNAPSHOT_DIR.mkdir(exist_ok=True)
+                if changed or not self.path.exists():
+                    tmp = self.path.with_suffix(".tmp")
+                    self.df.to_parquet(tmp, index=False)
+                    os.replace(tmp, self.path)
+                self.meta_path.write_text(json.dumps({"hash": self.content_hash, "fetched_at": self.fetched_at}))
+            except Exception as e:
+                self.stats["last_error"] = f"스냅샷 저장 실패: {e}"
+
+@st.cache_resource
+def get_sheet_cache():
+    cache = SheetCache(get_storage())
+    cache.archive = get_archive()
+    return cache
+
+@st.cache_resource
+def get_writer():
+    """저장소 지연 기록 대기열 (프로세스 공용). 대기열이 비면 스냅샷의 기록 시각을 갱신한다."""
+    cache = get_sheet_cache()
+    cache.writer = WriteBehindQueue(get_storage(), on_flushed=cache.put, prepare=to_sheet_frame, on_timing=perf.record)
+    return cache.writer
+
+class ArchiveCache:
+    """보관된 완료 업무 (프로세스 공용). '완료된 업무 보기'를 켰을 때 처음 한 번 모든 연도 파티션을 동시에 읽고,
+    보관 작업 뒤에만 다시 읽는다. 정본과 합친 프레임과 구간 인덱스는 정본 버전마다 한 번만 만든다."""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self.df = None
+        self._merged = None
+        self._id_floor = None
+
+    def id_floor(self):
+        """새 ID 의 하한 (보관된 최대 ID + 1). 처음 필요할 때 저장소에서 ID 만 확인하고, 보관 뒤 다시 구한다."""
+        with self._lock:
+            if self._id_floor is None: self._id_floor = self.storage.archive_max_id() + 1
+            return self._id_floor
+
+    def get(self):
+        with self._lock:
+            if self.df is None:
+                with perf.span("archive.read"):
+                    self.df = process_dataframe(read_archives(self.storage))
+            return self.df
+
+    def with_active(self, active):
+        """(정본 + 보관분 프레임, 그 구간 인덱스). 보관 도중 실패로 양쪽에 남은 행은 정본 쪽을 쓴다."""
+        archive = self.get()
+        cached = self._merged
+        if cached is None or cached[0] is not active or cached[1] is not archive:
+            merged = active
+            if not archive.empty:
+                archive_rows = archive[~archive["_original_id"].isin(active["_original_id"])]
+                merged = apply_schema(pd.concat([active, archive_rows], ignore_index=True))
+            cached = self._merged = (active, archive, merged, TaskIntervalIndex(merged))
+        return cached[2], cached[3]
+
+    def invalidate(self):
+        with self._lock:
+            self.df = None
+            self._id_floor = None
+
+@st.cache_resource
+def get_archive():
+    return ArchiveCache(get_storage())
+
+class SharedDataset:
+    """프로세스 공용 정본 데이터. 모든 세션이 같은 프레임을 읽기 전용으로 공유한다.
+
+    저장할 때는 세션이 보낸 변경분(change set)만 최신 프레임에 합친 새 프레임으로 교체하고 version 을 올린다.
+    기존 프레임은 수정하지 않으므로 이전 버전을 참조 중인 세션도 안전하다.
+    세션에는 필터/정렬 상태와 에디터의 편집 중인 내용만 남는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.today = get_now_kst().date()  # 남은기간 계산 기준일 (KST)
+        self.df = process_dataframe(pd.DataFrame(), self.today)
+        self.source_hash = None
+        self.version = 0
+        self._task_index = None
+        self._filter_index = None
+        self._workload = None
+        self._dependencies = None
+        self.vocab = VocabularyIndex(self.df)
+
+    def sync(self):
+        """저장소 스냅샷 내용이 바뀌었으면(다른 프로세스의 저장, 시트 직접 수정 등) 정본을 교체."""
+        cache = get_sheet_cache()
+        with perf.span("load.snapshot"):
+            sheet_df = load_data_from_sheet()
+        if cache.hash == self.source_hash: return self.refresh_day()
+        with self._lock:
+            if cache.hash == self.source_hash: return
+            with perf.span("load.process"):
+                self.today = get_now_kst().date()
+                source_hash, processed = cache.processed
+                if source_hash == cache.hash and processed is not None:
+                    df = refresh_remaining(processed, self.today)  # 다시 읽을 때 이미 처리한 프레임 (남은기간만 오늘 기준으로)
+                else:
+                    source_hash, df = cache.hash, process_dataframe(sheet_df.copy(), self.today)
+                self.vocab = VocabularyIndex(df)
+                self._publish(df, source_hash)
+
+    def refresh_day(self):
+        """KST 날짜가 바뀌었으면 남은기간만 한 번에 다시 계산해 정본을 교체 (나머지 파생 컬럼은 날짜와 무관)."""
+        day = get_now_kst().date()
+        if day == self.today: return
+        with self._lock:
+            if day == self.today: return
+            with perf.span("derived.rollover"):
+                df = refresh_remaining(self.df, day)
+                self.today = day
+                self._publish(df, self.source_hash)
+            self.verify(df)
+
+    def verify(self, df):
+        """SCHEDULE_VERIFY_DERIVED=1 일 때 df 의 파생 컬럼이 전체 재계산 결과와 같은지 대조해 다른 점을 로그로 남긴다."""
+        if not VERIFY_DERIVED: return
+        with perf.span("derived.verify"):
+            problems = derived_mismatches(df, self.today)
+        for problem in problems: verify_logger.error("파생 컬럼 불일치 (version %d): %s", self.version, problem)
+
+    def commit(self, changed_df, change_set):
+        """changed_df 의 변경 행을 최신 정본에 합쳐 바로 교체하고, 저장소 기록은 지연 기록 대기열에 넘긴다.
+        changed_df 는 change_set 의 추가/수정 행만 process_dataframe(..., dataset.today) 한 프레임이면 된다.
+        저장소에는 바뀐 행만 기록되며, 행 단위 기록이 불가하면 저장소가 전체를 덮어쓴다."""
+        with self._lock:
+            base = self.df
+            changed_df = refresh_remaining(changed_df, self.today)  # 처리 도중 날짜가 바뀌었어도 정본과 같은 기준일
+            merged, change_set = merge_change_set(base, changed_df, change_set, min_id=get_archive().id_floor())
+            # 시트 형태 변환, 스냅샷 해시/디스크 저장은 기록 스레드가 기록을 마친 뒤에 한다
+            writer, cache = get_writer(), get_sheet_cache()
+            with perf.span("save.enqueue"), cache.stage() as token:
+                writer.enqueue(merged, change_set, tag=token)
+            workload, dependencies = self._workload, self._dependencies
+            with perf.span("vocab.update"):
+                self.vocab.apply(base, merged, change_set)
+            self._publish(merged, token)
+            if workload is not None and workload[0] is base:
+                with perf.span("workload.update"):
+                    self._workload = (merged, workload[1].updated(merged, change_set))
+            if dependencies is not None and dependencies[0] is base:
+                self._dependencies = (merged, dependencies[1].updated(merged, change_set))
+            self.verify(merged)
+
+    def archive(self, today):
+        """보관 대상 완료 업무를 종료 연도별 보관 파티션에 기록한 뒤 정본에서 삭제. 반환: 보관한 행 수.
+        보관분 기록이 실패하면 정본에서 아무것도 지우지 않는다."""
+        base = self.df
+        batches = archive_batches(base, today)
+        if not batches: return 0
+        storage = get_storage()
+        with perf.span("archive.write"):
+            for year, rows in batches.items(): storage.write_archive(year, rows)
+        ids = [int(i) for rows in batches.values() for i in rows["_original_id"]]
+        self.commit(base, {"added": [], "modified": [], "deleted": ids})
+        get_archive().invalidate()
+        return len(ids)
+
+    def _publish(self, df, source_hash):
+        self.df, self.source_hash = df, source_hash
+        self.version += 1
+
+    def task_index(self, df):
+        """df(특정 버전의 정본)에 대한 구간 인덱스. 버전마다 한 번만 만든다."""
+        cached = self._task_index
+        if cached is None or cached[0] is not df:
+            cached = self._task_index = (df, TaskIntervalIndex(df))
+        return cached[1]
+
+    def filter_index(self, df):
+        """df(특정 버전의 정본)에 대한 업무 리스트 필터/정렬 인덱스. 버전마다 한 번만 만든다."""
+        cached = self._filter_index
+        if cached is None or cached[0] is not df:
+            cached = self._filter_index = (df, TaskFilterIndex(df))
+        return cached[1]
+
+    def dependencies(self, df):
+        """df(특정 버전의 정본)의 선행 관계 인덱스. 전체 파싱은 버전마다 한 번, 저장 시에는 바뀐 업무의 관계만 갱신한다."""
+        cached = self._dependencies
+        if cached is None or cached[0] is not df:
+            with perf.span("deps.build"):
+                cached = self._dependencies = (df, DependencyIndex(df))
+        return cached[1]
+
+    def workload(self, df, start, end):
+        """df 에 대한 담당자 × 영업일 부하 행렬. 저장 시에는 바뀐 업무만 갱신하고, 표시 기간이 범위를 벗어나면 넓혀 다시 만든다."""
+        cached = self._workload
+        if cached is None or cached[0] is not df or not cached[1].covers(start, end):
+            today = pd.to_datetime(get_now_kst().date())
+            with perf.span("workload.build"):
+                matrix = WorkloadMatrix(df, min(start, today - timedelta(days=WORKLOAD_DAYS_BEFORE)),
+                                        max(end, today + timedelta(days=WORKLOAD_DAYS_AFTER)))
+            cached = self._workload = (df, matrix)
+        return cached[1]
+
+@st.cache_resource
+def get_dataset():
+    return SharedDataset()
+
+dataset = get_dataset()
+dataset.sync()
+data = dataset.df  # 세션 간 공유되는 읽기 전용 프레임 — 수정하지 말고 필터/정렬한 뷰를 만들어 사용
+st.session_state['data_version'] = dataset.version  # 이번 전체 실행이 그린 정본 버전
+if 'show_completed' not in st.session_state: st.session_state['show_completed'] = False
 now_kst = get_now_kst()
 today = pd.to_datetime(now_kst.date())
 
-def get_unique_list(df, col_name):
-    return sorted(df[col_name].astype(str).dropna().unique().tolist()) if col_name in df.columns else []
+vocab = dataset.vocab  # 라벨별 선택지 (저장 시 변경 행만 반영해 갱신되는 공용 인덱스)
+projects_list = vocab.options("프로젝트명")
+items_list = vocab.options("구분")
+members_list = vocab.options("담당자")
+activity_list = vocab.options("Activity")
 
-projects_list = get_unique_list(data, "프로젝트명")
-items_list = get_unique_list(data, "구분")
-members_list = get_unique_list(data, "담당자")
-activity_list = get_unique_list(data, "Activity")
-
-def wrap_labels(text, width=15):
-    if pd.isna(text) or text == "": return ""
-    return "<br>".join(textwrap.wrap(str(text), width=width, break_long_words=True))
+# 아래 섹션들은 각자 st.fragment 로 독립 재실행된다 (위젯 조작 시 해당 섹션만 다시 그림).
+# 정본이 다른 세션의 저장 등으로 바뀌었을 때만 전체를 다시 실행해 모든 섹션을 함께 갱신한다.
+def ensure_current_version():
+    """프래그먼트 재실행 시 정본 버전이 이번 화면을 그린 버전과 다르면 전체 재실행."""
+    dataset.sync()
+    if dataset.version != st.session_state['data_version']: st.rerun()
 
 # -----------------------------------------------------------------------------
 # 4. [시각화] 테이블형 간트차트
 # -----------------------------------------------------------------------------
-if st.session_state['show_completed']:
-    chart_base_data = data.copy()
-else:
-    chart_base_data = data[data["진행률"] < 100].copy()
-
-chart_data = chart_base_data.dropna(subset=["시작일", "종료일"]).copy()
-
-with st.sidebar:
-    st.markdown("### 🎨 보기 설정")
-    force_print_theme = st.checkbox("🖨️ 인쇄용 테마 (배경 흰색)", value=False)
-    is_dark_mode = st.checkbox("🌙 다크 모드 최적화 (배경 어두움)", value=False)
-
-if not chart_data.empty:
-    chart_data = chart_data.sort_values(by=["프로젝트명", "시작일"], ascending=[True, True]).reset_index(drop=True)
-    
-    proj_display_list = []
-    prev_proj = None
-    for proj in chart_data["프로젝트명"]:
-        if proj == prev_proj: proj_display_list.append("") 
-        else: proj_display_list.append(proj); prev_proj = proj
-    
-    chart_data["프로젝트명_표시"] = [wrap_labels(p, 12) for p in proj_display_list]
-    chart_data["Activity_표시"] = chart_data["Activity"].apply(lambda x: wrap_labels(x, 12))
-    
-    unique_members = chart_data["담당자"].unique()
-    colors = px.colors.qualitative.Pastel
-    color_map = {member: colors[i % len(colors)] for i, member in enumerate(unique_members)}
-    
-    header_style = f"font-size:{FONT_SIZE_TEXT}pt; color:black; font-family:Arial"
-    
-    fig = make_subplots(
-        rows=1, cols=5,
-        shared_yaxes=True,
-        horizontal_spacing=0.005, 
-        column_widths=[0.10, 0.05, 0.05, 0.10, 0.70], 
-        subplot_titles=(
-            f"<b><span style='{header_style}'>프로젝트명</span></b>", 
-            f"<b><span style='{header_style}'>구분</span></b>", 
-            f"<b><span style='{header_style}'>담당자</span></b>", 
-            f"<b><span style='{header_style}'>Activity</span></b>", 
-            ""
-        ),
-        specs=[[{"type": "scatter"}, {"type": "scatter"}, {"type": "scatter"}, {"type": "scatter"}, {"type": "xy"}]]
-    )
-
-    num_rows = len(chart_data)
-    y_axis = list(range(num_rows))
-    
-    common_props = dict(
-        mode="text", 
-        textposition="middle center", 
-        textfont=dict(color="black", size=FONT_SIZE_TEXT, family="Arial"), 
-        hoverinfo="skip"
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_gantt_figure(chart_data, show_completed, force_print_theme, is_dark_mode, today, view_start, view_end):
+    """인자(데이터 내용 해시 + 보기 설정 + KST 날짜 + 표시 기간)가 같으면 캐시된 Figure 를 재사용한다.
+    현재 시각 표시선은 매 실행마다 달라지므로 호출하는 쪽에서 덧그린다."""
+    return schedule_core.build_gantt_figure(chart_data, show_completed, force_print_theme, is_dark_mode, today, view_start, view_end)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_workload_figure(members, days, load, force_print_theme, view_start, view_end):
+    return schedule_core.build_workload_figure(members, days, load, force_print_theme, view_start, view_end)
+
+# 표시 기간(이전/다음 이동)과 행 범위 선택
+if 'gantt_offset' not in st.session_state: st.session_state['gantt_offset'] = 0
+if 'gantt_row_start' not in st.session_state: st.session_state['gantt_row_start'] = 0
+
+def shift_gantt_window(step):
+    st.session_state['gantt_offset'] = st.session_state['gantt_offset'] + step if step else 0
+    st.session_state['gantt_row_start'] = 0
+
+def shift_gantt_rows(step):
+    st.session_state['gantt_row_start'] = max(0, st.session_state['gantt_row_start'] + step)
+
+def gantt_view():
+    """현재 표시 기간 (시작일, 종료일)."""
+    offset = st.session_state['gantt_offset']
+    return today - timedelta(days=GANTT_VIEW_BEFORE - offset), today + timedelta(days=GANTT_VIEW_AFTER + offset)
+
+def view_frame():
+    """(화면에 표시할 업무, 구간 인덱스). 완료 업무 보기가 켜져 있을 때만 보관된 완료 업무를 읽어 합친다."""
+    if not st.session_state['show_completed']: return data, dataset.task_index(data)
+    return get_archive().with_active(data)
+
+def gantt_rows(view_start, view_end):
+    """표시 기간(앞뒤 여유 구간 포함)과 겹치는 업무. 완료 업무 보기가 꺼져 있으면 미완료만."""
+    frame, index = view_frame()
+    task_rows = index.overlapping(
+        view_start - timedelta(days=GANTT_WINDOW_STEP), view_end + timedelta(days=GANTT_WINDOW_STEP)
     )
+    chart_data = frame.iloc[task_rows]
+    if not st.session_state['show_completed']:
+        chart_data = chart_data[chart_data["진행률"] < 100]
+    return chart_data
+
+@st.cache_data(max_entries=8, show_spinner="인쇄용 파일을 만드는 중...")
+def export_schedule(version, show_completed, today, view_start, view_end, fmt, _chart_data, _table_data):
+    """정본 버전 + 보기 설정이 같으면 이전에 만든 파일을 그대로 돌려준다 (데이터 프레임은 해시하지 않음)."""
+    return schedule_core.export_schedule(_chart_data, _table_data, today, view_start, view_end, fmt)
+
+@st.fragment
+def view_settings():
+    """사이드바 보기 설정. 차트에 영향을 주는 설정이 바뀌면 차트도 다시 그리도록 전체 재실행."""
+    st.markdown("### 🎨 보기 설정")
+    st.checkbox("🖨️ 인쇄용 테마 (배경 흰색)", key="force_print_theme")
+    st.checkbox("🌙 다크 모드 최적화 (배경 어두움)", key="is_dark_mode")
+    sync_age = get_sheet_cache().age()
+    if sync_age is not None: st.caption(f"🗂️ 데이터 동기화: {int(sync_age // 60)}분 전")
+    st.checkbox("👥 담당자별 부하 보기", key="show_workload")
+    show_perf = st.checkbox("⏱️ 성능 패널", key="show_perf")
+
+    chart_settings = (st.session_state['force_print_theme'], st.session_state['is_dark_mode'], st.session_state['show_workload'])
+    if st.session_state.setdefault('chart_settings', chart_settings) != chart_settings:
+        st.session_state['chart_settings'] = chart_settings
+        st.rerun()
 
-    fig.add_trace(go.Scatter(x=[0.5]*num_rows, y=y_axis, text=chart_data["프로젝트명_표시"], **common_props), row=1, col=1)
-    fig.add_trace(go.Scatter(x=[0.5]*num_rows, y=y_axis, text=chart_data["구분"], **common_props), row=1, col=2)
-    fig.add_trace(go.Scatter(x=[0.5]*num_rows, y=y_axis, text=chart_data["담당자"], **common_props), row=1, col=3)
-    fig.add_trace(go.Scatter(x=[0.5]*num_rows, y=y_axis, text=chart_data["Activity_표시"], **common_props), row=1, col=4)
-
-    for idx, row in chart_data.iterrows():
-        start_date = row["시작일"]
-        end_date = row["종료일"]
-        duration_ms = ((end_date - start_date).days + 1) * 24 * 3600 * 1000
-        work_days = get_business_days(row["시작일"], row["종료일"])
-        bar_text = f"{work_days}일 / {row['진행률']}%"
-
-        fig.add_trace(go.Bar(
-            base=[start_date], 
-            x=[duration_ms], 
-            y=[idx],
-            orientation='h',
-            marker_color=color_map.get(row["담당자"], "grey"),
-            opacity=0.8,
-            hoverinfo="text",
-            hovertext=f"<b>{row['프로젝트명']}</b><br>{row['Activity']}<br>{row['시작일'].strftime('%Y-%m-%d')} ~ {row['종료일'].strftime('%Y-%m-%d')}<br>작업일: {work_days}일",
-            text=bar_text, textposition='inside', insidetextanchor='middle',
-            textfont=dict(color='black', size=FONT_SIZE_TEXT, family="Arial"),
-            showlegend=False
-        ), row=1, col=5)
-
-    view_start = today - timedelta(days=5)
-    view_end = today + timedelta(days=20)
-    
-    calc_start = today - timedelta(days=60)
-    calc_end = today + timedelta(days=60)
-    if pd.notna(chart_data["시작일"].min()) and pd.notna(chart_data["종료일"].max()):
-        calc_start = min(calc_start, chart_data["시작일"].min() - timedelta(days=10))
-        calc_end = max(calc_end, chart_data["종료일"].max() + timedelta(days=10))
-
-    holiday_fill_color = "rgba(0, 0, 0, 0.05)"
-    holiday_text_color = "rgba(0, 0, 0, 0.5)" 
-    grid_color = "rgba(128, 128, 128, 0.2)"
-
-    for i in range(num_rows + 1):
-        fig.add_shape(type="line", xref="paper", yref="y", x0=0, x1=1, y0=i-0.5, y1=i-0.5, line=dict(color=grid_color, width=1))
-
-    tick_vals = []
-    tick_text = []
-    day_map = {'Mon': '월', 'Tue': '화', 'Wed': '수', 'Thu': '목', 'Fri': '금', 'Sat': '토', 'Sun': '일'}
-    
-    curr_check = calc_start
-    while curr_check <= calc_end:
-        tick_vals.append(curr_check + timedelta(hours=12))
-        
-        fig.add_shape(
-            type="line", xref="x", yref="y",
-            x0=curr_check, x1=curr_check, 
-            y0=-0.5, y1=num_rows - 0.5,
-            line=dict(color=grid_color, width=1, dash="dash"),
-            row=1, col=5
-        )
-
-        korean_day = day_map[curr_check.strftime('%a')]
-        formatted_date = f"{curr_check.month}/{curr_check.day}<br>{korean_day}"
-        
-        if is_holiday(curr_check):
-            formatted_date = f"<span style='color:{holiday_text_color}'>{formatted_date}</span>"
-            fig.add_shape(
-                type="rect", xref="x", yref="y", 
-                x0=curr_check, x1=curr_check + timedelta(days=1),
-                y0=-0.5, y1=num_rows - 0.5,
-                fillcolor=holiday_fill_color, opacity=1, layer="below", line_width=0,
-                row=1, col=5 
+    # 인쇄용 내보내기: 간트차트(인쇄용 테마)와 업무 리스트를 서버에서 페이지별로 렌더링
+    st.markdown("### 🖨️ 인쇄용 내보내기")
+    fmt = st.radio("형식", ["PDF", "PNG"], horizontal=True, key="export_format").lower()
+    view_start, view_end = gantt_view()
+    export_key = (st.session_state['data_version'], st.session_state['show_completed'], view_start, view_end, fmt)
+    if st.button("📄 파일 만들기", use_container_width=True): st.session_state['export_key'] = export_key
+    if st.session_state.get('export_key') == export_key:
+        table_data = view_frame()[0] if st.session_state['show_completed'] else data[data["진행률"] < 100]
+        try:
+            with perf.span("export.render"):
+                payload = export_schedule(*export_key[:2], today, view_start, view_end, fmt, gantt_rows(view_start, view_end), table_data)
+            st.download_button(
+                "⬇️ 다운로드", payload, use_container_width=True,
+                file_name=f"schedule_{view_start:%Y%m%d}_{view_end:%Y%m%d}.{'pdf' if fmt == 'pdf' else 'zip'}",
+                mime="application/pdf" if fmt == "pdf" else "application/zip",
             )
-        tick_text.append(formatted_date)
-        curr_check += timedelta(days=1)
-
-    for i in range(1, 5):
-        fig.update_xaxes(showgrid=False, zeroline=False, showticklabels=False, row=1, col=i)
-        fig.update_yaxes(showgrid=False, zeroline=False, showticklabels=False, autorange="reversed", row=1, col=i)
-
-    fig.update_xaxes(
-        type="date", 
-        range=[view_start, view_end], 
-        side="top",
-        tickfont=dict(size=FONT_SIZE_DATE, color="black", family="Arial"),
-        tickvals=tick_vals,
-        ticktext=tick_text,
-        showgrid=False,
-        zeroline=False,
-        row=1, col=5
-    )
-    fig.update_yaxes(showticklabels=False, showgrid=False, fixedrange=True, autorange="reversed", row=1, col=5)
-    
-    fig.add_vline(x=now_kst, line_width=1.5, line_dash="dot", line_color="red", row=1, col=5)
+        except Exception as e: st.error(f"내보내기 실패: {e}")
+
+    # 완료 업무 보관: 활성 시트에는 진행 중/최근 완료 업무만 남기고 나머지는 종료 연도별 보관 시트로
+    st.markdown("### 🗄️ 완료 업무 보관")
+    archive_count = int(archivable(data, today).sum())
+    st.caption(f"완료 후 {ARCHIVE_AFTER_DAYS}일이 지난 업무 {archive_count}건 — 보관하면 '완료된 업무 보기'를 켰을 때만 불러옵니다.")
+    if st.button("🗄️ 보관하기", disabled=not archive_count, use_container_width=True):
+        try:
+            with st.spinner("보관 중..."):
+                archived = dataset.archive(today)
+            st.toast(f"🗄️ 완료 업무 {archived}건을 보관했습니다.")
+            st.rerun()  # 정본이 바뀌었으므로 전체 재실행
+        except Exception as e: st.error(f"보관 실패: {e}")
+
+    # 성능 패널 (선택 시 표시) — 전체/섹션별 재실행 시간 포함
+    if show_perf:
+        st.markdown("### ⏱️ 단계별 소요 시간")
+        st.dataframe(perf.summary().round(1), hide_index=True, use_container_width=True)
+        stats = get_sheet_cache().stats
+        st.caption(f"📄 스냅샷: 적중 {stats['hits']} / 미적중 {stats['misses']} / 교체 {stats['swaps']}")
+
+@st.fragment(run_every=3)
+def write_status():
+    """저장소 기록 대기열 상태 (몇 초마다 이 부분만 갱신)."""
+    writer, status = get_writer(), get_writer().status
+    if status["last_error"]:
+        retry_in = max(0, int((status["retry_at"] or time.time()) - time.time()))
+        st.caption(f"⚠️ 저장소 기록 실패 — {retry_in}초 후 재시도 (대기 {writer.depth}건): {status['last_error']}")
+    elif writer.depth:
+        st.caption(f"💾 저장소에 기록 중... (대기 {writer.depth}건)")
+    elif status["last_flush_at"]:
+        st.caption(f"💾 저장소 기록 완료: {datetime.fromtimestamp(status['last_flush_at'], KST):%H:%M:%S} ({status['last_flush_rows']}건, {status['last_flush_ms']:.0f} ms)")
+    if get_sheet_cache().stats["last_error"]:
+        st.caption(f"⚠️ 저장소 다시 읽기/스냅샷 오류: {get_sheet_cache().stats['last_error']}")
 
-    layout_bg = "white" if force_print_theme else None
-    
-    MAX_HEIGHT_ROWS = 18
-    effective_rows = min(num_rows, MAX_HEIGHT_ROWS)
-    
-    calculated_height = num_rows * 30 + 70
-    final_height = max(400, min(610, calculated_height))
-    
-    fig.update_layout(
-        height=final_height,
-        margin=dict(l=10, r=10, t=60, b=10), 
-        title={
-            'text': f"<b>HL Design 1DV 1Team Project Schedule</b>",
-            'y': 0.99, 'x': 0.05, 'xanchor': 'left', 'yanchor': 'top', 
-            'pad': dict(b=20), 
-            'font': dict(color="black", size=FONT_SIZE_TITLE, family="Arial")
-        },
-        font=dict(color="black", family="Arial"),
-        paper_bgcolor=layout_bg, 
-        plot_bgcolor=layout_bg,
-        showlegend=False, 
-        dragmode="pan"
-    )
+with st.sidebar:
+    view_settings()
+    write_status()
+
+@st.fragment
+def gantt_section():
+    ensure_current_version()
+    t0 = time.perf_counter()
+    force_print_theme, is_dark_mode = st.session_state['force_print_theme'], st.session_state['is_dark_mode']
+    view_start, view_end = gantt_view()
+    chart_data = gantt_rows(view_start, view_end).sort_values(by=["프로젝트명", "시작일"], ascending=[True, True])
+
+    g_prev, g_today, g_next, g_range, g_rows, g_up, g_down, g_rows_info = st.columns([0.07, 0.07, 0.07, 0.25, 0.12, 0.07, 0.07, 0.28])
+    with g_prev: st.button("◀ 이전", on_click=shift_gantt_window, args=(-GANTT_WINDOW_STEP,), use_container_width=True)
+    with g_today: st.button("오늘", on_click=shift_gantt_window, args=(0,), use_container_width=True)
+    with g_next: st.button("다음 ▶", on_click=shift_gantt_window, args=(GANTT_WINDOW_STEP,), use_container_width=True)
+    with g_range: st.markdown(f'<div class="sort-label no-print">{view_start:%Y-%m-%d} ~ {view_end:%Y-%m-%d}</div>', unsafe_allow_html=True)
+    with g_rows: rows_per_view = st.selectbox("표시 행 수", GANTT_ROW_OPTIONS, label_visibility="collapsed", on_change=lambda: st.session_state.update(gantt_row_start=0))
+    with g_up: st.button("▲", on_click=shift_gantt_rows, args=(-rows_per_view,), use_container_width=True)
+    with g_down: st.button("▼", on_click=shift_gantt_rows, args=(rows_per_view,), use_container_width=True)
+
+    row_start = min(st.session_state['gantt_row_start'], max(0, len(chart_data) - rows_per_view))
+    st.session_state['gantt_row_start'] = row_start
+    visible_data = chart_data.iloc[row_start:row_start + rows_per_view]
+    with g_rows_info:
+        if len(chart_data):
+            st.markdown(f'<div class="sort-label no-print">{row_start + 1}–{row_start + len(visible_data)} / {len(chart_data)}행</div>', unsafe_allow_html=True)
+
+    if not visible_data.empty:
+        with perf.span("gantt.build"):
+            # 공용 카테고리(전체 어휘)까지 해시하지 않도록 표시 행의 라벨만 일반 문자열로 넘김
+            fig = build_gantt_figure(as_plain_labels(visible_data), st.session_state['show_completed'], force_print_theme, is_dark_mode, today, view_start, view_end)
+        fig.add_vline(x=get_now_kst(), line_width=1.5, line_dash="dot", line_color="red", row=1, col=5)
+        with perf.span("gantt.render"):
+            st.plotly_chart(fig, use_container_width=True, config={'scrollZoom': False, 'displayModeBar': True})
+    else:
+        st.info("📅 표시할 일정이 없습니다.")
+
+    # 담당자 × 영업일 부하 히트맵 (간트차트와 같은 표시 기간, 미완료 업무 기준)
+    if st.session_state['show_workload']:
+        members, days, load = dataset.workload(data, view_start, view_end).window(view_start, view_end)
+        if members:
+            with perf.span("workload.render"):
+                st.markdown("**👥 담당자별 업무 부하 (진행 중인 업무 수)**")
+                st.plotly_chart(build_workload_figure(members, days, load, force_print_theme, view_start, view_end),
+                                use_container_width=True, config={'scrollZoom': False, 'displayModeBar': False})
+        else:
+            st.info("👥 표시 기간에 진행 중인 업무가 없습니다.")
+    perf.record("fragment.gantt", (time.perf_counter() - t0) * 1000)
 
-    st.plotly_chart(fig, use_container_width=True, config={'scrollZoom': False, 'displayModeBar': True})
-else:
-    st.info("📅 표시할 일정이 없습니다.")
+gantt_section()
 
 # -----------------------------------------------------------------------------
 # 5. [입력 섹션]
@@ -446,139 +736,183 @@ def on_days_change():
     s, d = st.session_state.new_start, st.session_state.new_days
     if s and d > 0: st.session_state.new_end = add_business_days(s, d)
 
-with st.expander("➕ 새 일정 등록하기 (기간 자동 계산)"):
-    c1, c2 = st.columns(2)
-    c3, c4, c5 = st.columns([1, 1, 1])
-
-    with c1:
-        new_proj = st.selectbox("1. 프로젝트명", ["선택하세요"] + projects_list + ["➕ 직접 입력"])
-        if new_proj == "➕ 직접 입력": new_proj = st.text_input("└ 프로젝트명 입력")
-        new_item = st.selectbox("2. 구분", ["선택하세요"] + items_list + ["➕ 직접 입력"])
-        if new_item == "➕ 직접 입력": new_item = st.text_input("└ 구분 입력")
-    with c2:
-        new_member = st.selectbox("3. 담당자", ["선택하세요"] + members_list + ["➕ 직접 입력"])
-        if new_member == "➕ 직접 입력": new_member = st.text_input("└ 담당자 입력")
-        new_act = st.selectbox("4. Activity", ["선택하세요"] + activity_list + ["➕ 직접 입력"])
-        if new_act == "➕ 직접 입력": new_act = st.text_input("└ Activity 입력")
-    with c3: st.date_input("5. 시작일", key="new_start", on_change=on_date_change)
-    with c4: st.number_input("6. 작업기간(일)", min_value=1, value=1, key="new_days", on_change=on_days_change)
-    with c5: st.date_input("7. 종료일", key="new_end", on_change=on_date_change)
-
-    if st.button("저장", type="primary", use_container_width=True):
-        if not new_proj or new_proj == "선택하세요":
-            st.error("프로젝트명을 입력해주세요.")
-        else:
-            new_id = int(time.time())
-            new_row = pd.DataFrame([{
-                "프로젝트명": new_proj, 
-                "구분": new_item if new_item != "선택하세요" else "", 
-                "담당자": new_member if new_member != "선택하세요" else "",
-                "Activity": new_act if new_act != "선택하세요" else "", 
-                "시작일": pd.to_datetime(st.session_state.new_start), 
-                "종료일": pd.to_datetime(st.session_state.new_end), 
-                "작업기간": st.session_state.new_days,
-                "진행률": 0,
-                "_original_id": new_id
-            }])
-            st.session_state['data'] = pd.concat([st.session_state['data'], new_row], ignore_index=True)
-            try:
-                save_data = st.session_state['data'].copy()
-                if "_original_id" in save_data.columns: save_data.drop(columns=["_original_id"], inplace=True)
-                save_data["시작일"] = save_data["시작일"].dt.strftime("%Y-%m-%d").fillna("")
-                save_data["종료일"] = save_data["종료일"].dt.strftime("%Y-%m-%d").fillna("")
-                conn.update(worksheet="Sheet1", data=save_data)
-                load_data_from_sheet.clear()
-                st.session_state['data'] = process_dataframe(save_data)
-                st.success("✅ 추가되었습니다!")
-                time.sleep(0.5)
-                st.rerun()
-            except Exception as e: st.error(f"저장 실패: {e}")
+@st.fragment
+def add_task_form():
+    ensure_current_version()
+    t0 = time.perf_counter()
+    with st.expander("➕ 새 일정 등록하기 (기간 자동 계산)"):
+        ranked = st.toggle("최근·자주 쓴 항목 먼저", value=False, key="options_ranked")
+        options = vocab.ranked if ranked else vocab.options
+        c1, c2 = st.columns(2)
+        c3, c4, c5 = st.columns([1, 1, 1])
+
+        with c1:
+            new_proj = st.selectbox("1. 프로젝트명", ["선택하세요"] + options("프로젝트명") + ["➕ 직접 입력"])
+            if new_proj == "➕ 직접 입력": new_proj = st.text_input("└ 프로젝트명 입력")
+            new_item = st.selectbox("2. 구분", ["선택하세요"] + options("구분") + ["➕ 직접 입력"])
+            if new_item == "➕ 직접 입력": new_item = st.text_input("└ 구분 입력")
+        with c2:
+            new_member = st.selectbox("3. 담당자", ["선택하세요"] + options("담당자") + ["➕ 직접 입력"])
+            if new_member == "➕ 직접 입력": new_member = st.text_input("└ 담당자 입력")
+            new_act = st.selectbox("4. Activity", ["선택하세요"] + options("Activity") + ["➕ 직접 입력"])
+            if new_act == "➕ 직접 입력": new_act = st.text_input("└ Activity 입력")
+        with c3: st.date_input("5. 시작일", key="new_start", on_change=on_date_change)
+        with c4: st.number_input("6. 작업기간(일)", min_value=1, value=1, key="new_days", on_change=on_days_change)
+        with c5: st.date_input("7. 종료일", key="new_end", on_change=on_date_change)
+
+        if st.button("저장", type="primary", use_container_width=True):
+            if not new_proj or new_proj == "선택하세요":
+                st.error("프로젝트명을 입력해주세요.")
+            else:
+                new_id = int(time.time())
+                new_row = pd.DataFrame([{
+                    "프로젝트명": new_proj, 
+                    "구분": new_item if new_item != "선택하세요" else "", 
+                    "담당자": new_member if new_member != "선택하세요" else "",
+                    "Activity": new_act if new_act != "선택하세요" else "", 
+                    "시작일": pd.to_datetime(st.session_state.new_start), 
+                    "종료일": pd.to_datetime(st.session_state.new_end), 
+                    "작업기간": st.session_state.new_days,
+                    "진행률": 0,
+                    "_original_id": new_id
+                }])
+                try:
+                    with perf.span("save.process"):
+                        save_data = process_dataframe(new_row, dataset.today)
+                    dataset.commit(save_data, {"added": [new_id], "modified": [], "deleted": []})
+                    st.toast("✅ 추가되었습니다!")
+                    st.rerun()  # 정본이 바뀌었으므로 전체 재실행
+                except Exception as e: st.error(f"저장 실패: {e}")
+    perf.record("fragment.add_form", (time.perf_counter() - t0) * 1000)
+
+add_task_form()
 
 # -----------------------------------------------------------------------------
 # 6. 데이터 에디터 및 저장
 # -----------------------------------------------------------------------------
 st.markdown("<div class='no-print' style='height: 20px;'></div>", unsafe_allow_html=True)
-c_title, c_label, c_box, c_sort, c_show = st.columns([0.22, 0.08, 0.17, 0.15, 0.38])
-
-with c_title: st.markdown('<div class="subheader-text no-print">📝 업무 리스트</div>', unsafe_allow_html=True)
-with c_label: st.markdown('<div class="sort-label no-print">정렬 기준</div>', unsafe_allow_html=True)
-with c_box: sort_col = st.selectbox("정렬", ["프로젝트명", "구분", "담당자", "시작일", "종료일"], label_visibility="collapsed")
-with c_sort: sort_asc = st.toggle("오름차순", value=True)
-with c_show: 
-    show_completed = st.toggle("완료된 업무 보기", value=st.session_state['show_completed'])
-    if show_completed != st.session_state['show_completed']:
-        st.session_state['show_completed'] = show_completed
-        st.rerun()
 
-editor_df = st.session_state['data'].copy()
-if not st.session_state['show_completed']: 
-    editor_df = editor_df[editor_df["진행률"] < 100]
-
-editor_df = editor_df.sort_values(by=sort_col, ascending=sort_asc).reset_index(drop=True)
-
-display_cols = ["프로젝트명", "구분", "담당자", "Activity", "작업기간", "시작일", "종료일", "남은기간", "진행률", "진행상황", "_original_id"]
-
-edited_df = st.data_editor(
-    editor_df,
-    height=(len(editor_df) + 2) * 35 + 3,
-    use_container_width=True,
-    num_rows="dynamic",
-    column_config={
-        "_original_id": None,
-        "프로젝트명": st.column_config.SelectboxColumn("프로젝트명", options=projects_list, required=True),
-        "구분": st.column_config.SelectboxColumn("구분", options=items_list),
-        "담당자": st.column_config.SelectboxColumn("담당자", options=members_list),
-        "Activity": st.column_config.SelectboxColumn("Activity", options=activity_list),
-        "작업기간": st.column_config.NumberColumn("작업기간(일)", min_value=1, format="%d"),
-        "진행률": st.column_config.NumberColumn("진행률(%)", min_value=0, max_value=100, step=10, format="%d"),
-        "진행상황": st.column_config.ProgressColumn("Bar", format="%d%%", min_value=0, max_value=100),
-        "시작일": st.column_config.DateColumn("시작일", format="YYYY-MM-DD"),
-        "종료일": st.column_config.DateColumn("종료일", format="YYYY-MM-DD"),
-        "남은기간": st.column_config.NumberColumn("D-Day", format="%d일", disabled=True),
-    },
-    column_order=[c for c in display_cols if c != "_original_id"],
-    hide_index=True,
-    key="data_editor"
-)
+@st.fragment
+def task_editor():
+    ensure_current_version()
+    t0 = time.perf_counter()
+    # 편집 중인 내용이 있는 동안에는 편집을 시작한 버전의 정본(참조만 보관)을 기준으로 표시해
+    # 다른 세션의 저장으로 행 위치가 바뀌어도 편집 내용이 엉뚱한 행에 적용되지 않도록 함.
+    # 에디터의 편집 내용은 표시 순서 기준이므로 편집 중에는 정렬/필터/페이지도 바꿀 수 없게 한다
+    if 'editor_gen' not in st.session_state: st.session_state['editor_gen'] = 0
+    if 'editor_page' not in st.session_state: st.session_state['editor_page'] = 0
+    editor_key = f"data_editor_{st.session_state['editor_gen']}"
+    editor_state = st.session_state.get(editor_key, {})
+    has_pending_edits = any(editor_state.get(k) for k in ("edited_rows", "added_rows", "deleted_rows"))
+    if not has_pending_edits or 'editor_base' not in st.session_state:
+        st.session_state['editor_base'] = data
+    editor_base = st.session_state['editor_base']
+    reset_page = lambda: st.session_state.update(editor_page=0)
+
+    c_title, c_label, c_box, c_sort, c_show = st.columns([0.22, 0.08, 0.17, 0.15, 0.38])
+
+    with c_title: st.markdown('<div class="subheader-text no-print">📝 업무 리스트</div>', unsafe_allow_html=True)
+    with c_label: st.markdown('<div class="sort-label no-print">정렬 기준</div>', unsafe_allow_html=True)
+    with c_box: sort_col = st.selectbox("정렬", ["프로젝트명", "구분", "담당자", "시작일", "종료일"], label_visibility="collapsed", disabled=has_pending_edits, on_change=reset_page)
+    with c_sort: sort_asc = st.toggle("오름차순", value=True, disabled=has_pending_edits, on_change=reset_page)
+    with c_show: 
+        show_completed = st.toggle("완료된 업무 보기", value=st.session_state['show_completed'], disabled=has_pending_edits)
+        if show_completed != st.session_state['show_completed']:
+            st.session_state['show_completed'] = show_completed
+            st.session_state['editor_page'] = 0
+            st.rerun()  # 간트차트도 완료 업무 표시 여부를 따르므로 전체 재실행
+
+    # 서버 측 필터: 조건에 맞는 행을 정렬한 뒤 현재 페이지만 에디터에 보낸다
+    f_member, f_project, f_period, f_text = st.columns([0.22, 0.22, 0.22, 0.34])
+    with f_member: members = st.multiselect("담당자", members_list, key="filter_members", disabled=has_pending_edits, on_change=reset_page)
+    with f_project: projects = st.multiselect("프로젝트명", projects_list, key="filter_projects", disabled=has_pending_edits, on_change=reset_page)
+    with f_period: period = st.date_input("기간 (겹치는 업무)", value=(), key="filter_period", disabled=has_pending_edits, on_change=reset_page)
+    with f_text: text = st.text_input("검색 (프로젝트/구분/담당자/Activity/ID)", key="filter_text", disabled=has_pending_edits, on_change=reset_page)
+
+    with perf.span("editor.filter"):
+        index = dataset.filter_index(editor_base)
+        mask = index.query(members, projects, tuple(period) if len(period) == 2 else None, text, st.session_state['show_completed'])
+        page_size = st.session_state.get('editor_page_size', EDITOR_PAGE_SIZES[0])
+        n_pages = max(1, -(-int(mask.sum()) // page_size))
+        page = st.session_state['editor_page'] = min(st.session_state['editor_page'], n_pages - 1)
+        rows, total = index.page(mask, sort_col, sort_asc, page, page_size)
+
+    editor_df = as_plain_labels(editor_base.iloc[rows].reset_index(drop=True))  # 자유 입력 가능하도록 일반 문자열로
+    editor_df["진행상황"] = editor_df["진행률"]  # 진행률 막대 표시용 파생 컬럼 (저장하지 않음)
+
+    display_cols = ["_original_id", "프로젝트명", "구분", "담당자", "Activity", "작업기간", "시작일", "종료일", "남은기간", "진행률", "진행상황", "선행업무"]
+
+    p_prev, p_next, p_size, p_info = st.columns([0.07, 0.07, 0.12, 0.74])
+    with p_prev: st.button("◀", key="editor_prev", on_click=lambda: st.session_state.update(editor_page=page - 1), disabled=has_pending_edits or page == 0, use_container_width=True)
+    with p_next: st.button("▶", key="editor_next", on_click=lambda: st.session_state.update(editor_page=page + 1), disabled=has_pending_edits or page >= n_pages - 1, use_container_width=True)
+    with p_size: st.selectbox("페이지당 행 수", EDITOR_PAGE_SIZES, key="editor_page_size", label_visibility="collapsed", disabled=has_pending_edits, on_change=reset_page)
+    with p_info:
+        info = f"{page + 1} / {n_pages} 페이지 · {total:,}건 중 {page * page_size + min(1, len(rows))}–{page * page_size + len(rows)}"
+        if has_pending_edits: info += " · 편집 중에는 정렬·필터·페이지를 바꿀 수 없습니다"
+        st.markdown(f'<div class="sort-label no-print" style="justify-content: flex-start;">{info}</div>', unsafe_allow_html=True)
+
+    with perf.span("editor.render"):
+        edited_df = st.data_editor(
+            editor_df,
+            height=(len(editor_df) + 2) * 35 + 3,
+            use_container_width=True,
+            num_rows="dynamic",
+            column_config={
+                "_original_id": st.column_config.NumberColumn("ID", format="%d", disabled=True),
+                "프로젝트명": st.column_config.SelectboxColumn("프로젝트명", options=projects_list, required=True),
+                "구분": st.column_config.SelectboxColumn("구분", options=items_list),
+                "담당자": st.column_config.SelectboxColumn("담당자", options=members_list),
+                "Activity": st.column_config.SelectboxColumn("Activity", options=activity_list),
+                "작업기간": st.column_config.NumberColumn("작업기간(일)", min_value=1, format="%d"),
+                "진행률": st.column_config.NumberColumn("진행률(%)", min_value=0, max_value=100, step=10, format="%d"),
+                "진행상황": st.column_config.ProgressColumn("Bar", format="%d%%", min_value=0, max_value=100),
+                "시작일": st.column_config.DateColumn("시작일", format="YYYY-MM-DD"),
+                "종료일": st.column_config.DateColumn("종료일", format="YYYY-MM-DD"),
+                "남은기간": st.column_config.NumberColumn("D-Day", format="%d일", disabled=True),
+                "선행업무": st.column_config.TextColumn("선행업무", help="선행 업무 ID 를 쉼표로 구분 (ID+N: 선행 업무 종료 후 N 영업일 뒤 시작). 선행 업무가 늦어지면 자동으로 뒤로 밀립니다."),
+            },
+            column_order=display_cols,
+            hide_index=True,
+            key=editor_key
+        )
 
-if st.button("💾 변경사항 저장하기", type="primary", use_container_width=True):
-    try:
-        with st.spinner("저장 중..."):
-            master_df = st.session_state['data'].copy()
-            existing_ids_in_editor = edited_df.dropna(subset=["_original_id"])["_original_id"].unique()
-            master_df = master_df[master_df["_original_id"].isin(existing_ids_in_editor)].copy()
-            
-            if "_original_id" in master_df.columns:
-                master_df.set_index("_original_id", inplace=True)
-                updates = edited_df.dropna(subset=["_original_id"]).set_index("_original_id")
-                
-                for idx in updates.index:
-                    if idx in master_df.index:
-                        old_row = master_df.loc[idx]
-                        new_row = updates.loc[idx]
-                        if new_row["작업기간"] != old_row["작업기간"]:
-                            updates.at[idx, "종료일"] = add_business_days(new_row["시작일"], new_row["작업기간"])
-                        elif (new_row["시작일"] != old_row["시작일"]) or (new_row["종료일"] != old_row["종료일"]):
-                            updates.at[idx, "작업기간"] = get_business_days(new_row["시작일"], new_row["종료일"])
-
-                master_df.update(updates)
-                master_df.reset_index(inplace=True)
-
-                new_rows = edited_df[edited_df["_original_id"].isna() | (edited_df["_original_id"] == "")]
-                if not new_rows.empty:
-                    new_rows = new_rows.drop(columns=["_original_id"], errors='ignore')
-                    new_rows["작업기간"] = new_rows.apply(lambda x: get_business_days(x["시작일"], x["종료일"]), axis=1)
-                    master_df = pd.concat([master_df, new_rows], ignore_index=True)
-
-                save_df = master_df.copy()
-                if "_original_id" in save_df.columns: save_df.drop(columns=["_original_id"], inplace=True)
-                save_df["시작일"] = pd.to_datetime(save_df["시작일"]).dt.strftime("%Y-%m-%d").fillna("")
-                save_df["종료일"] = pd.to_datetime(save_df["종료일"]).dt.strftime("%Y-%m-%d").fillna("")
-                
-                conn.update(worksheet="Sheet1", data=save_df)
-                load_data_from_sheet.clear()
-                st.session_state['data'] = process_dataframe(save_df)
-                st.success("✅ 저장되었습니다.")
-                time.sleep(1)
-                st.rerun()
-    except Exception as e: st.error(f"오류: {e}")
+    if has_pending_edits and st.button("↩️ 편집 취소", use_container_width=True):
+        st.session_state['editor_gen'] += 1
+        st.rerun(scope="fragment")
+    if st.button("💾 변경사항 저장하기", type="primary", use_container_width=True):
+        try:
+            with st.spinner("저장 중..."):
+                with perf.span("save.diff"):
+                    master_df, change_set = apply_editor_changes(editor_base, editor_df, edited_df, min_id=get_archive().id_floor())
+                with perf.span("save.reschedule"):
+                    # 날짜가 바뀐 업무의 후행 업무까지 함께 옮겨 한 번에 저장
+                    # 정본의 선행 관계에서 편집한 업무의 관계만 다시 파싱
+                    edges = dataset.dependencies(editor_base).updated(master_df, change_set).edges(master_df)
+                    master_df, moved = reschedule(master_df, change_set["added"] + change_set["modified"], edges=edges)
+                    change_set["modified"] = sorted(set(change_set["modified"]) | (set(moved) - set(change_set["added"])))
+                with perf.span("save.process"):
+                    # 추가/수정된 행만 다시 파싱해 파생 컬럼 계산 (나머지 행은 정본 값을 그대로 씀)
+                    touched = master_df["_original_id"].isin(change_set["added"] + change_set["modified"])
+                    save_df = process_dataframe(master_df[touched], dataset.today)
+                dataset.commit(save_df, change_set)
+                st.session_state['editor_gen'] += 1
+                st.toast("✅ 저장되었습니다.")
+                if moved: st.toast(f"🔁 후행 업무 {len(moved)}건의 일정을 함께 옮겼습니다.")
+                st.rerun()  # 정본이 바뀌었으므로 전체 재실행
+        except Exception as e: st.error(f"오류: {e}")
+
+    # 보관된 완료 업무는 읽기 전용으로 따로 표시 (완료 업무 보기를 켰을 때만 불러옴)
+    if st.session_state['show_completed']:
+        archived = get_archive().get()
+        if not archived.empty:
+            with st.expander(f"🗄️ 보관된 완료 업무 ({len(archived)}건, 읽기 전용)"):
+                st.dataframe(as_plain_labels(archived.sort_values(by=sort_col, ascending=sort_asc))[[c for c in display_cols if c != "진행상황"]],
+                             hide_index=True, use_container_width=True, column_config={"_original_id": st.column_config.NumberColumn("ID", format="%d")})
+    perf.record("fragment.editor", (time.perf_counter() - t0) * 1000)
+
+task_editor()
+
+# -----------------------------------------------------------------------------
+# 7. 전체 실행 시간 기록 (성능 패널은 사이드바 보기 설정에 표시)
+# -----------------------------------------------------------------------------
+perf.record("rerun.total", (time.perf_counter() - rerun_started) * 1000)
@@ -0,0 +1,163 @@
+"""합성 일정 데이터로 핵심 로직(schedule_core) 성능 측정.
+
+    python benchmarks/bench_schedule.py                   # 1k / 10k / 100k 업무
+    python benchmarks/bench_schedule.py --sizes 1000 5000 --seed 1
+
+단계별 소요 시간(ms)과 최대 메모리(MB, tracemalloc), 처리된 업무 프레임 크기(MB), 간트 Figure JSON 크기(KB)를 출력한다.
+Streamlit 이나 구글 시트 연결 없이 실행된다.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import schedule_core as core
+
+
+def make_schedule(n, seed=0, years=3):
+    """시트에서 읽은 것과 같은 형태(문자열 날짜, "50%" 진행률, ID 열)의 합성 일정.
+    담당자/프로젝트 수는 업무 수에 비례하고, 시작일은 오늘 기준 과거 years 년 ~ 6개월 뒤에 분포한다."""
+    rng = np.random.default_rng(seed)
+    n_members = max(10, n // 50)
+    n_projects = max(5, n // 20)
+    today = pd.Timestamp(core.get_now_kst().date())
+    starts = today + pd.to_timedelta(rng.integers(-365 * years, 180, n), "D")
+    ends = starts + pd.to_timedelta(rng.integers(0, 40, n), "D")
+    return pd.DataFrame({
+        "프로젝트명": [f"프로젝트 {i:05d}" for i in rng.integers(0, n_projects, n)],
+        "구분": rng.choice(["디자인", "검토", "설계", "승인", "제작"], n),
+        "담당자": [f"담당자{i:04d}" for i in rng.integers(0, n_members, n)],
+        "Activity": [f"Activity {i} 세부 작업 내용" for i in range(n)],
+        "작업기간": "",
+        "시작일": starts.strftime("%Y-%m-%d"),
+        "종료일": ends.strftime("%Y-%m-%d"),
+        "진행률": [f"{p}%" for p in rng.choice(np.arange(0, 110, 10), n)],
+        "_original_id": np.arange(n),
+    })
+
+
+def make_edits(shown, seed=0, ratio=0.05):
+    """에디터 편집 흉내: ratio 만큼 작업기간/날짜/텍스트 수정, ratio/5 만큼 삭제, ratio/5 만큼 추가."""
+    rng = np.random.default_rng(seed)
+    edited = shown.copy()
+    n = len(edited)
+    k = max(1, int(n * ratio))
+    rows = rng.choice(n, min(n, 3 * k), replace=False)
+    dur, dates, text = rows[:k], rows[k:2 * k], rows[2 * k:]
+    edited.loc[edited.index[dur], "작업기간"] = edited["작업기간"].iloc[dur] + 2
+    edited.loc[edited.index[dates], "시작일"] = edited["시작일"].iloc[dates] - timedelta(days=1)
+    edited.loc[edited.index[text], "Activity"] = "수정됨"
+    edited = edited.drop(index=edited.index[rng.choice(n, max(1, k // 5), replace=False)])
+    new_rows = edited.head(max(1, k // 5)).copy()
+    new_rows["_original_id"] = np.nan
+    return pd.concat([edited, new_rows], ignore_index=True)
+
+
+def measure(fn):
+    """(결과, 소요 ms, 최대 메모리 MB). tracemalloc 이 실행을 느리게 하므로 시간과 메모리는 따로 잰다."""
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - t0) * 1000
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def run(n, seed):
+    raw = make_schedule(n, seed)
+    core.get_calendar().busday_count(raw["시작일"], raw["종료일"])  # 공휴일 달력 준비는 측정에서 제외
+    results = {}
+
+    data, *results["load (process_dataframe)"] = measure(lambda: core.process_dataframe(raw.copy()))
+
+    today = pd.Timestamp(core.get_now_kst().date())
+    view_start = today - timedelta(days=core.GANTT_VIEW_BEFORE)
+    view_end = today + timedelta(days=core.GANTT_VIEW_AFTER)
+    margin = timedelta(days=core.GANTT_WINDOW_STEP)
+
+    index, *results["interval index build"] = measure(lambda: core.TaskIntervalIndex(data))
+    rows, *results["interval index query"] = measure(lambda: index.overlapping(view_start - margin, view_end + margin))
+    chart_data = data.iloc[rows]
+    chart_data = chart_data[chart_data["진행률"] < 100]
+    fig, *results[f"figure build ({len(chart_data)} rows)"] = measure(
+        lambda: core.build_gantt_figure(chart_data, False, False, False, today, view_start, view_end)
+    )
+    fig_json, *results["figure to_json"] = measure(fig.to_json)
+
+    shown = core.as_plain_labels(data[data["진행률"] < 100].reset_index(drop=True))
+    edited = make_edits(shown, seed)
+
+    def save_diff():
+        master, change_set = core.apply_editor_changes(data, shown, edited)
+        touched = master["_original_id"].isin(change_set["added"] + change_set["modified"])
+        merged, change_set = core.merge_change_set(data, core.process_dataframe(master[touched], today), change_set)
+        return merged, change_set
+    (merged, change_set), *results["save diff"] = measure(save_diff)
+    problems, *results["verify derived (full recompute)"] = measure(lambda: core.derived_mismatches(merged, today))
+    assert not problems, problems
+    tomorrow = today + timedelta(days=1)
+    rolled, *results["day rollover (remaining days)"] = measure(lambda: core.refresh_remaining(merged, tomorrow))
+    assert not core.derived_mismatches(rolled, tomorrow)
+
+    workload_start = today - timedelta(days=core.WORKLOAD_DAYS_BEFORE)
+    workload_end = today + timedelta(days=core.WORKLOAD_DAYS_AFTER)
+    workload, *results["workload matrix build"] = measure(lambda: core.WorkloadMatrix(data, workload_start, workload_end))
+    few = {"added": [], "modified": data["_original_id"].head(10).tolist(), "deleted": []}
+    _, *results["workload update (10 rows)"] = measure(lambda: workload.updated(data, few))
+    vocab, *results["vocabulary index build"] = measure(lambda: core.VocabularyIndex(data))
+    _, *results["vocabulary update (10 rows)"] = measure(lambda: vocab.apply(data, data, few))
+    fresh = core.VocabularyIndex(data)
+    assert all(vocab.ranked(col) == fresh.ranked(col) for col in core.LABEL_COLUMNS), "증분 갱신한 선택지 순서가 새로 만든 것과 다름"
+
+    filters, *results["filter index build"] = measure(lambda: core.TaskFilterIndex(data))
+    members = data["담당자"].cat.categories[:3].tolist()
+    _, *results["filter query (3 members + text)"] = measure(lambda: filters.query(members, text="세부", include_completed=False))
+    mask = filters.query(include_completed=False)
+    filters.order("시작일", True)
+    _, *results["editor page (sorted, 100 rows)"] = measure(lambda: filters.page(mask, "시작일", True, 3, 100))
+
+    # 담당자별로 시작일 순서대로 이어진 선행 관계를 만들고, 각 사슬의 첫 업무 10개를 5일 늦춤
+    prev = data.sort_values("시작일").groupby("담당자", observed=True)["_original_id"].shift()
+    chained = data.assign(선행업무=core.normalize_dependencies(prev.reindex(data.index)))
+    heads = chained.loc[chained["선행업무"] == "", "_original_id"].head(10).tolist()
+    slipped = chained.copy()
+    slip_rows = slipped["_original_id"].isin(heads)
+    slipped.loc[slip_rows, "종료일"] = slipped.loc[slip_rows, "종료일"] + timedelta(days=5)
+    deps, *results["dependency index build"] = measure(lambda: core.DependencyIndex(chained))
+    slip_set = {"added": [], "modified": heads, "deleted": []}
+    updated, *results["dependency update (10 rows)"] = measure(lambda: deps.updated(slipped, slip_set))
+    edges = updated.edges(slipped)
+    fresh = core.dependency_edges(slipped)
+    assert edges.sort_values(["succ", "pred"]).reset_index(drop=True).equals(fresh.sort_values(["succ", "pred"]).reset_index(drop=True)), \
+        "증분 갱신한 선행 관계가 새로 파싱한 것과 다름"
+    (_, moved), *results["reschedule (10 slipped chains)"] = measure(lambda: core.reschedule(slipped, heads, edges=edges))
+
+    print(f"\n== {n:,} tasks ==")
+    for name, (ms, mb) in results.items():
+        print(f"  {name:<36} {ms:10.1f} ms  {mb:8.1f} MB")
+    print(f"  {'task frame memory':<36} {data.memory_usage(deep=True).sum() / 2**20:10.1f} MB")
+    print(f"  {'figure JSON size':<36} {len(fig_json) / 1024:10.1f} KB")
+    print(f"  {'change set (added/modified/deleted)':<36} "
+          f"{len(change_set['added'])}/{len(change_set['modified'])}/{len(change_set['deleted'])}")
+    print(f"  {'rescheduled successors':<36} {len(moved):10,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for n in args.sizes:
+        run(n, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""새 프로세스에서 schedule_core 를 import 하는 데 걸리는 시간 점검.
+
+    python benchmarks/import_budget.py                # 기본 예산 1.0초
+    python benchmarks/import_budget.py --budget 0.8 --repeat 5
+
+깨끗한 인터프리터를 repeat 번 띄워 중앙값을 재고, 무거운 모듈(plotly, holidays, streamlit_gsheets 등)이
+import 시점에 함께 올라오지 않았는지 확인한다. 예산을 넘거나 무거운 모듈이 보이면 종료 코드 1.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ["plotly", "holidays", "streamlit", "streamlit_gsheets", "gspread", "duckdb", "PIL", "kaleido"]
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import schedule_core
+elapsed = time.perf_counter() - t0
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def probe():
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=1.0, help="허용 import 시간 (초, 중앙값 기준)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [probe() for _ in range(args.repeat)]
+    median = statistics.median(r["seconds"] for r in results)
+    loaded = sorted({m for r in results for m in r["loaded"]})
+
+    print(f"import schedule_core: {median * 1000:.0f} ms (중앙값, {args.repeat}회) / 예산 {args.budget * 1000:.0f} ms")
+    if loaded:
+        print(f"import 시점에 불러오면 안 되는 모듈: {', '.join(loaded)}")
+    ok = median <= args.budget and not loaded
+    print("OK" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
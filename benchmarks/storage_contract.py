@@ -0,0 +1,128 @@
+"""저장소(storage.py) 공통 계약 점검 + 저장/다시 읽기 소요 시간 측정.
+
+    python benchmarks/storage_contract.py                                  # SQLite (임시 파일)
+    python benchmarks/storage_contract.py --rows 10000
+    python benchmarks/storage_contract.py --backend gsheets --worksheet contract_test
+
+모든 저장소가 같은 순서로 전체 덮어쓰기 → ID 조회 → 변경분 저장(수정/추가/삭제, 없는 ID 의 수정) →
+연도별 보관 파티션 기록/동시 읽기/최대 ID 조회를 거친 뒤 다시 읽은 내용이 기대값과 같은지 확인한다. 구글 시트는 .streamlit/secrets.toml 의 연결 설정을 쓰고
+지정한 워크시트를 덮어쓰므로 반드시 테스트용 워크시트를 지정한다. 실패하면 종료 코드 1.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import schedule_core as core
+from storage import GSheetsBackend, SQLiteBackend, read_archives
+from bench_schedule import make_schedule
+
+
+def normalized(df):
+    """저장소마다 다른 읽기 형태(문자열/숫자)를 to_sheet_frame 형태로 맞추고 ID 순으로 정렬."""
+    df = core.to_sheet_frame(core.process_dataframe(df.copy()))
+    return df.sort_values("_original_id").reset_index(drop=True)
+
+
+def expect_equal(name, actual, expected):
+    a, e = normalized(actual), normalized(expected)
+    ok = a.shape == e.shape and (a.astype(str).values == e.astype(str).values).all()
+    print(f"  {'OK ' if ok else 'FAIL'} {name}")
+    return ok
+
+
+def timed(results, name, fn):
+    t0 = time.perf_counter()
+    out = fn()
+    results[name] = (time.perf_counter() - t0) * 1000
+    return out
+
+
+def check_contract(backend, rows):
+    """계약 점검. (통과 여부, 단계별 소요 ms)"""
+    results, ok = {}, True
+    base = core.to_sheet_frame(core.process_dataframe(make_schedule(rows)))
+
+    timed(results, "replace_all", lambda: backend.replace_all(base))
+    ok &= expect_equal("전체 덮어쓰기 후 읽기", timed(results, "read", backend.read), base)
+
+    ids = base["_original_id"].iloc[[0, len(base) // 2, -1]].tolist()
+    ok &= expect_equal("ID 조회", timed(results, "get_rows (3 ids)", lambda: backend.get_rows(ids)),
+                       base[base["_original_id"].isin(ids)])
+
+    k = max(1, rows // 20)
+    changed = base.copy()
+    modified = changed["_original_id"].iloc[:k].tolist()
+    changed.loc[changed.index[:k], "Activity"] = "계약 점검"
+    changed.loc[changed.index[:k], "진행률"] = 50
+    deleted = changed["_original_id"].iloc[k:2 * k].tolist()
+    changed = changed[~changed["_original_id"].isin(deleted)]
+    start = int(base["_original_id"].max()) + 1
+    new_rows = base.head(k).assign(_original_id=range(start, start + k), 프로젝트명="신규")
+    changed = pd.concat([changed, new_rows], ignore_index=True)
+    change_set = {"added": new_rows["_original_id"].tolist(), "modified": modified, "deleted": deleted}
+    timed(results, f"write_changes ({k}/{k}/{k})", lambda: backend.write_changes(changed, change_set))
+    ok &= expect_equal("변경분 저장 후 읽기", backend.read(), changed)
+
+    backend.write_changes(changed, {"added": [], "modified": [], "deleted": []})
+    ok &= expect_equal("빈 변경분은 무변화", backend.read(), changed)
+
+    # 저장소에 없는 ID 의 수정(다른 세션이 먼저 지운 행 등)은 추가로 처리
+    ghost = changed.tail(1).assign(_original_id=start + k)
+    upserted = pd.concat([changed, ghost], ignore_index=True)
+    backend.write_changes(upserted, {"added": [], "modified": [start + k], "deleted": []})
+    ok &= expect_equal("없는 ID 의 수정은 추가", backend.read(), upserted)
+
+    # 보관 파티션: 연도별 기록, 같은 ID 는 덮어쓰기, 모든 연도 동시 읽기 (활성 데이터는 그대로)
+    years = [9001, 9002]  # 실제 데이터의 보관 연도와 겹치지 않는 연도
+    parts = {years[0]: base.head(k), years[1]: base.iloc[k:2 * k]}
+    for year, rows in parts.items():
+        timed(results, f"write_archive ({len(rows)} rows)", lambda: backend.write_archive(year, rows))
+    backend.write_archive(years[0], parts[years[0]].head(1).assign(Activity="보관 덮어쓰기"))
+    expected = pd.concat([parts[years[0]].head(1).assign(Activity="보관 덮어쓰기"), parts[years[0]].iloc[1:], parts[years[1]]])
+    listed = [y for y in backend.archive_years() if y in years]
+    print(f"  {'OK ' if listed == years else 'FAIL'} 보관 연도 목록")
+    ok &= listed == years
+    ok &= expect_equal("보관분 동시 읽기", timed(results, "read_archives (2 years)", lambda: read_archives(backend, years)), expected)
+    max_id = timed(results, "archive_max_id", backend.archive_max_id)
+    id_ok = max_id >= int(expected["_original_id"].max())  # 다른 보관 연도가 있으면 더 클 수 있음
+    print(f"  {'OK ' if id_ok else 'FAIL'} 보관분 최대 ID")
+    ok &= id_ok
+    ok &= expect_equal("보관 후 활성 데이터 유지", backend.read(), upserted)
+    return ok, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["sqlite", "gsheets"], default="sqlite")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--path", help="SQLite 파일 (기본: 임시 파일)")
+    parser.add_argument("--worksheet", help="구글 시트 점검용 워크시트 (덮어씀)")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        path = args.path or Path(tempfile.mkdtemp()) / "contract.db"
+        backend = SQLiteBackend(path)
+    else:
+        if not args.worksheet: parser.error("--backend gsheets 는 --worksheet(덮어써도 되는 워크시트)가 필요합니다")
+        import streamlit as st
+        from streamlit_gsheets import GSheetsConnection
+        backend = GSheetsBackend(st.connection("gsheets", type=GSheetsConnection), args.worksheet)
+
+    print(f"== {backend.name} ({args.rows:,} rows) ==")
+    ok, results = check_contract(backend, args.rows)
+    for name, ms in results.items():
+        print(f"  {name:<36} {ms:10.1f} ms")
+    print("OK" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
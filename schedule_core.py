@@ -0,0 +1,1127 @@
+"""일정 관리 핵심 로직 (Streamlit / 구글 시트 연결 없이 import 가능).
+
+app.py 와 benchmarks/ 에서 함께 사용한다.
+"""
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+import textwrap
+import numpy as np
+import threading
+import hashlib
+
+# 세션들이 같은 프레임을 공유하므로 필터/정렬 결과가 원본을 복사하지 않고 참조하도록 Copy-on-Write 사용 (pandas 3 은 기본값)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# plotly / holidays 는 import 비용이 있어 실제로 필요한 함수 안에서 불러온다 (benchmarks/import_budget.py 로 확인)
+
+KST = timezone(timedelta(hours=9), "KST")  # 한국은 일광절약시간이 없어 고정 오프셋으로 충분
+
+def get_now_kst():
+    return datetime.now(KST).replace(tzinfo=None)
+
+FONT_SIZE_TITLE = 18
+FONT_SIZE_TEXT = 10
+FONT_SIZE_DATE = 8
+
+# -----------------------------------------------------------------------------
+# 영업일 계산
+# -----------------------------------------------------------------------------
+WEEKMASK = "1111100"  # 월~금 영업일
+
+def _kr_holidays(years):
+    """지정한 연도들의 한국 공휴일 {날짜: 이름}. holidays 패키지가 없으면 빈 dict."""
+    try:
+        import holidays
+    except ImportError:
+        return {}
+    return holidays.KR(years=years)
+
+class BusinessCalendar:
+    """주말 + 한국 공휴일 기준 영업일 계산기.
+
+    np.busdaycalendar 를 한 번 만들어 재사용하고, 데이터에 새 연도가 나타날 때만 다시 만든다.
+    모든 메서드는 Series/배열 단위로 동작하며 NaT 는 0(또는 원래 값)으로 처리한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._years = range(0)
+        self._cal = np.busdaycalendar(weekmask=WEEKMASK)
+
+    @staticmethod
+    def _as_days(values):
+        if isinstance(values, np.ndarray) and values.dtype == "datetime64[D]": return values
+        dates = pd.to_datetime(pd.Series(values), errors='coerce')
+        return dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+
+    def _ensure_years(self, days):
+        days = days[~np.isnat(days)]
+        if days.size == 0: return
+        lo = int(days.min().astype("datetime64[Y]").astype(int)) + 1970
+        hi = int(days.max().astype("datetime64[Y]").astype(int)) + 1970
+        if lo in self._years and hi in self._years: return
+        with self._lock:
+            if self._years:
+                lo, hi = min(lo, self._years.start), max(hi, self._years.stop - 1)
+            years = range(lo, hi + 1)
+            kr = _kr_holidays(years)
+            holiday_days = np.array(sorted(kr.keys()), dtype="datetime64[D]")
+            self._cal = np.busdaycalendar(weekmask=WEEKMASK, holidays=holiday_days)
+            self._years = years
+
+    def busday_count(self, start, end):
+        """시작일~종료일(양 끝 포함) 영업일 수. 날짜가 비었거나 시작일 > 종료일이면 0."""
+        s, e = self._as_days(start), self._as_days(end)
+        out = np.zeros(len(s), dtype=np.int64)
+        valid = ~np.isnat(s) & ~np.isnat(e) & (s <= e)
+        if valid.any():
+            self._ensure_years(np.concatenate([s[valid], e[valid]]))
+            out[valid] = np.busday_count(s[valid], e[valid] + 1, busdaycal=self._cal)
+        return out
+
+    def busday_offset(self, start, days):
+        """시작일을 1일째로 세어 days 번째 영업일. 날짜가 비었거나 days <= 0 이면 시작일 그대로."""
+        s = self._as_days(start)
+        d = pd.to_numeric(pd.Series(days), errors='coerce').to_numpy(dtype=float)
+        out = s.copy()
+        valid = ~np.isnat(s) & ~np.isnan(d) & (d > 0)
+        if valid.any():
+            offsets = d[valid].astype(np.int64) - 1
+            # 주말/공휴일을 감안해도 넉넉한 상한까지 연도 범위를 확보
+            self._ensure_years(np.concatenate([s[valid], s[valid] + (offsets * 2 + 31).astype("timedelta64[D]")]))
+            out[valid] = np.busday_offset(s[valid], offsets, roll='forward', busdaycal=self._cal)
+        return out
+
+    def next_start(self, end, lag):
+        """종료일 다음 영업일에서 lag 영업일 지난 날 (lag 가 음수면 그만큼 앞당김). 종료일이 비었으면 NaT."""
+        e = self._as_days(end)
+        l = np.asarray(lag, dtype=np.int64)
+        out = e.copy()
+        valid = ~np.isnat(e)
+        if valid.any():
+            margin = (np.abs(l[valid]) * 2 + 31).astype("timedelta64[D]")
+            self._ensure_years(np.concatenate([e[valid] - margin, e[valid] + margin]))
+            out[valid] = np.busday_offset(e[valid], l[valid] + 1, roll='backward', busdaycal=self._cal)
+        return out
+
+    def business_days(self, start, end):
+        """start~end(양 끝 포함) 사이의 영업일 배열 (datetime64[D])."""
+        days = np.arange(np.datetime64(pd.Timestamp(start), "D"), np.datetime64(pd.Timestamp(end), "D") + 1)
+        if days.size == 0: return days
+        self._ensure_years(days[[0, -1]])
+        return days[np.is_busday(days, busdaycal=self._cal)]
+
+    def is_holiday(self, dates):
+        """주말 또는 공휴일 여부 (bool 배열)."""
+        d = self._as_days(dates)
+        out = np.zeros(len(d), dtype=bool)
+        valid = ~np.isnat(d)
+        if valid.any():
+            self._ensure_years(d[valid])
+            out[valid] = ~np.is_busday(d[valid], busdaycal=self._cal)
+        return out
+
+_calendar = BusinessCalendar()
+
+def get_calendar():
+    """프로세스 공용 영업일 계산기 (모듈이 한 번만 import 되므로 프로세스당 1개)."""
+    return _calendar
+
+def get_business_days(start_date, end_date):
+    return int(get_calendar().busday_count([start_date], [end_date])[0])
+
+def add_business_days(start_date, days):
+    if pd.isna(start_date) or pd.isna(days) or days <= 0: return start_date
+    target = get_calendar().busday_offset([start_date], [days])[0]
+    return pd.Timestamp(target).date()
+
+# -----------------------------------------------------------------------------
+# 데이터 정리 / 변경 비교
+# -----------------------------------------------------------------------------
+# 시트에 저장되는 컬럼 (순서 = 시트 열 순서). _original_id 는 행 단위 변경 저장의 키로 사용
+SHEET_COLUMNS = ["프로젝트명", "구분", "담당자", "Activity", "작업기간", "시작일", "종료일", "진행률", "선행업무", "_original_id"]
+
+LABEL_COLUMNS = ["프로젝트명", "구분", "담당자", "Activity"]
+# 라벨 컬럼의 공용 카테고리 (프로세스 단위로 누적, 정렬 유지) — 모든 프레임이 같은 dtype 을 쓰도록 함
+_label_dtypes = {col: pd.CategoricalDtype(pd.Index([], dtype=object)) for col in LABEL_COLUMNS}
+_label_known = {col: set() for col in LABEL_COLUMNS}
+_label_lookup = {}  # col → (dtype, object 카테고리 Index) — 해시 테이블을 dtype 마다 한 번만 만들어 코드 변환에 재사용
+_label_lock = threading.Lock()
+
+def label_dtype(col, values):
+    """col 의 공용 카테고리 dtype. values 에 처음 보는 값이 있으면 카테고리를 넓혀(정렬) 갱신한다."""
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        if values.dtype is _label_dtypes[col]: return values.dtype
+        values = values.dtype.categories
+    with _label_lock:
+        known = _label_known[col]
+        new = set(pd.unique(pd.Series(values).dropna().to_numpy(dtype=object))) - known
+        if new:
+            known |= new
+            _label_dtypes[col] = pd.CategoricalDtype(pd.Index(sorted(known)))
+        return _label_dtypes[col]
+
+def label_positions(col, dtype, values):
+    """values 의 dtype(col 의 공용 카테고리) 내 위치 (없으면 -1). 저장 시 몇 행만 변환해도 전체 카테고리를 다시 훑지 않는다."""
+    cached = _label_lookup.get(col)
+    if cached is None or cached[0] is not dtype:
+        cached = _label_lookup[col] = (dtype, pd.Index(dtype.categories, dtype=object))
+    return cached[1].get_indexer(values)
+
+def apply_schema(df):
+    """작업 테이블의 compact 스키마 적용.
+    라벨 4종은 공용 카테고리, 진행률은 int8(0~100), 작업기간/남은기간은 int32, _original_id 는 int64."""
+    for col in LABEL_COLUMNS:
+        dtype = df[col].dtype
+        if dtype is _label_dtypes[col]: continue  # 이미 공용 카테고리
+        if isinstance(dtype, pd.CategoricalDtype) and dtype == _label_dtypes[col]:
+            # .loc / concat 을 거치면 카테고리는 같지만 dtype 객체가 달라짐 — 코드만 공용 dtype 으로 다시 감쌈
+            df[col] = pd.Categorical.from_codes(df[col].cat.codes, dtype=_label_dtypes[col], validate=False)
+            continue
+        # 고유값만 문자열로 정리해 공용 카테고리 코드로 옮긴다 (행 단위 변환보다 훨씬 빠름)
+        codes, uniques = pd.factorize(df[col])
+        if not pd.api.types.is_string_dtype(uniques): uniques = uniques.astype(str)  # 시트에서 숫자로 읽힌 라벨 등
+        dtype = label_dtype(col, uniques)
+        positions = label_positions(col, dtype, uniques)
+        df[col] = pd.Categorical.from_codes(np.where(codes < 0, -1, positions[codes]), dtype=dtype)
+    df["진행률"] = df["진행률"].clip(0, 100).astype("int8")
+    df["작업기간"] = df["작업기간"].astype("int32")
+    df["남은기간"] = df["남은기간"].astype("int32")
+    df["_original_id"] = df["_original_id"].astype("int64")
+    return df
+
+def as_plain_labels(df):
+    """라벨 컬럼을 일반 object 로 바꾼 사본 (카테고리에 없는 값을 넣거나 서로 다른 프레임과 비교할 때).
+    공용 카테고리는 전체 어휘를 담고 있으므로 astype(object) 대신 쓰인 코드의 라벨만 꺼냄."""
+    plain = {}
+    for col in LABEL_COLUMNS:
+        if col not in df.columns: continue
+        s = df[col]
+        if not isinstance(s.dtype, pd.CategoricalDtype):
+            plain[col] = s.astype(object)
+            continue
+        codes = s.cat.codes.to_numpy()
+        values = s.cat.categories.take(np.where(codes < 0, 0, codes)).to_numpy(dtype=object) if len(s.cat.categories) else np.full(len(s), np.nan, dtype=object)
+        values[codes < 0] = np.nan
+        plain[col] = pd.Series(values, index=df.index, dtype=object)
+    return df.assign(**plain)
+
+def remaining_days(end_dates, today):
+    """종료일(datetime64 Series)까지 남은 일수 (종료일 - today). 종료일이 비었으면 0."""
+    return (end_dates - pd.Timestamp(today)).dt.days.fillna(0).astype("int32")
+
+def refresh_remaining(df, today):
+    """남은기간만 today 기준으로 다시 계산한 새 프레임 (KST 날짜가 바뀌었을 때 한 번, 나머지 컬럼은 그대로)."""
+    return df.assign(남은기간=remaining_days(df["종료일"], today))
+
+def process_dataframe(df, today=None, min_id=0):
+    """시트에서 읽은 원본(문자열 날짜, "50%" 진행률 등)을 파싱하고 파생 컬럼(작업기간, 남은기간)을 계산해 스키마를 적용.
+    저장할 때는 바뀐 행만 넣어 호출한다. today: 남은기간 기준일 (기본: 오늘 KST).
+    min_id: ID 가 빈 행에 새로 매기는 ID 의 하한 (보관된 ID 와 겹치지 않도록)."""
+    required_cols = SHEET_COLUMNS
+    if df.empty:
+        df = pd.DataFrame(columns=required_cols)
+    else:
+        for col in required_cols:
+            if col not in df.columns: df[col] = ""
+
+    for col in ["시작일", "종료일"]:
+        # 저장 시 넘어오는 행은 이미 datetime64 — to_datetime 이 원소 단위로 훑지 않도록 건너뜀
+        if not pd.api.types.is_datetime64_dtype(df[col]): df[col] = pd.to_datetime(df[col], errors='coerce')
+    
+    df["남은기간"] = remaining_days(df["종료일"], get_now_kst().date() if today is None else today)
+
+    if not pd.api.types.is_numeric_dtype(df["진행률"]):
+        df["진행률"] = df["진행률"].astype(str).str.replace('%', '')
+    df["진행률"] = pd.to_numeric(df["진행률"], errors='coerce').fillna(0).astype(int)
+    
+    df["작업기간"] = get_calendar().busday_count(df["시작일"], df["종료일"])
+    df["선행업무"] = normalize_dependencies(df["선행업무"])
+    
+    # [중요] _original_id 오류 수정 로직
+    # 1. 숫자로 변환 (실패시 NaN)
+    df["_original_id"] = pd.to_numeric(df["_original_id"], errors='coerce')
+    
+    # 2. NaN 채우기 및 신규 ID 할당
+    if df["_original_id"].isnull().all():
+         df["_original_id"] = range(min_id, min_id + len(df))
+    else:
+        mask = df["_original_id"].isna()
+        valid_ids = df["_original_id"].dropna()
+        start_id = max(int(valid_ids.max()) + 1 if not valid_ids.empty else 0, min_id)
+        df.loc[mask, "_original_id"] = range(start_id, start_id + mask.sum())
+
+    return apply_schema(df)
+
+def to_sheet_frame(df):
+    """시트에 기록할 형태(SHEET_COLUMNS, 날짜는 문자열, 빈 값은 "")로 변환."""
+    sheet_df = df[SHEET_COLUMNS].copy()
+    for col in ["시작일", "종료일"]:
+        sheet_df[col] = pd.to_datetime(sheet_df[col], errors='coerce').dt.strftime("%Y-%m-%d").fillna("")
+    for col in ["작업기간", "진행률", "_original_id"]:
+        sheet_df[col] = pd.to_numeric(sheet_df[col], errors='coerce').fillna(0).astype("int64")
+    for col in LABEL_COLUMNS + ["선행업무"]:
+        values = sheet_df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            labels = np.append(values.cat.categories.to_numpy(dtype=object), "")  # 코드 -1(빈 값) → ""
+            sheet_df[col] = labels[values.cat.codes.to_numpy()]
+        else:
+            sheet_df[col] = values.astype(object).fillna("").astype(str)
+    return sheet_df.reset_index(drop=True)
+
+EDITABLE_COLUMNS = ["프로젝트명", "구분", "담당자", "Activity", "작업기간", "시작일", "종료일", "진행률", "선행업무"]
+
+def _changed(new, old):
+    """NaN/NaT 끼리는 같은 값으로 보는 요소별 비교."""
+    return (new != old) & ~(new.isna() & old.isna())
+
+def apply_editor_changes(master_df, shown_df, edited_df, min_id=0):
+    """데이터 에디터 편집 결과를 원본 프레임에 한 번에 반영.
+
+    _original_id 로 편집 전/후 행을 정렬한 뒤, 작업기간이 바뀐 행은 종료일을, 날짜가 바뀐 행은 작업기간을
+    해당 행들만 모아 일괄 재계산한다. 에디터에 표시되지 않았던 행(예: 숨긴 완료 업무)은 그대로 둔다.
+    추가 행의 ID 는 최대 ID + 1 부터 매기되 min_id(보관된 최대 ID + 1) 아래로는 내려가지 않는다.
+    작업용 사본은 표시된 행만으로 만들고, 나머지 행은 정본 그대로 뒤에 다시 붙인다 (편집한 행은 맨 뒤로 감).
+    반환: (반영된 프레임, {"added": [...], "modified": [...], "deleted": [...]})
+    """
+    cal = get_calendar()
+    edited_df = as_plain_labels(edited_df)
+    edited_ids = pd.to_numeric(edited_df["_original_id"], errors='coerce')
+    shown_ids = pd.to_numeric(shown_df["_original_id"], errors='coerce').dropna().astype("int64")
+    in_view = master_df["_original_id"].isin(shown_ids) | master_df["_original_id"].isin(edited_ids.dropna())
+    # 작은 정수 타입에는 재계산 값을 바로 넣을 수 없으므로 작업용 사본은 float 로 넓힌다 (process_dataframe 이 되돌림)
+    master = as_plain_labels(master_df[in_view]).astype({"작업기간": "float64", "진행률": "float64", "남은기간": "float64"}).set_index("_original_id")
+    updates = edited_df[edited_ids.notna()].set_index(edited_ids[edited_ids.notna()].astype("int64"))
+    updates = updates[updates.index.isin(master.index)]
+
+    old = master.loc[updates.index, EDITABLE_COLUMNS]
+    new = updates[EDITABLE_COLUMNS].copy()
+    for col in ["시작일", "종료일"]:
+        new[col] = pd.to_datetime(new[col], errors='coerce')
+    for col in ["작업기간", "진행률"]:
+        new[col] = pd.to_numeric(new[col], errors='coerce').astype("float64")
+    new["선행업무"] = normalize_dependencies(new["선행업무"])  # 지운 칸(None)도 "" 로 저장되도록
+    new = new.where(new.notna(), old)  # 기존 DataFrame.update 와 같이 빈 값은 덮어쓰지 않음
+
+    duration_changed = _changed(pd.to_numeric(new["작업기간"], errors='coerce'), old["작업기간"])
+    dates_changed = ~duration_changed & (_changed(new["시작일"], old["시작일"]) | _changed(new["종료일"], old["종료일"]))
+    if duration_changed.any():
+        rows = new[duration_changed]
+        new.loc[duration_changed, "종료일"] = pd.to_datetime(cal.busday_offset(rows["시작일"], rows["작업기간"]))
+    if dates_changed.any():
+        rows = new[dates_changed]
+        new.loc[dates_changed, "작업기간"] = cal.busday_count(rows["시작일"], rows["종료일"])
+
+    modified = pd.Series(False, index=new.index)
+    for col in EDITABLE_COLUMNS:
+        if col in ("작업기간", "진행률"):
+            modified |= _changed(pd.to_numeric(new[col], errors='coerce'), pd.to_numeric(old[col], errors='coerce'))
+        else:
+            modified |= _changed(new[col], old[col])
+    master.loc[new.index, EDITABLE_COLUMNS] = new
+
+    deleted = shown_ids[~shown_ids.isin(updates.index)].tolist()
+    master = master.drop(index=deleted).reset_index()
+
+    new_rows = edited_df[edited_ids.isna()].copy()
+    added = []
+    if not new_rows.empty:
+        start_id = max(int(master_df["_original_id"].max()) + 1 if not master_df.empty else 0, min_id)
+        added = list(range(start_id, start_id + len(new_rows)))
+        new_rows["_original_id"] = added
+        new_rows["작업기간"] = cal.busday_count(new_rows["시작일"], new_rows["종료일"])
+        master = pd.concat([master, new_rows], ignore_index=True)
+
+    # 편집한 행의 라벨을 공용 카테고리 코드로 되돌려 나머지 정본 행과 합침 (처음 보는 라벨이 있을 때만 나머지 행을 다시 코드화)
+    rest = master_df[~in_view]
+    for col in LABEL_COLUMNS:
+        values = master[col].where(master[col].isna(), master[col].astype(str))
+        dtype = label_dtype(col, values)
+        master[col] = pd.Categorical.from_codes(label_positions(col, dtype, values), dtype=dtype)
+        if rest[col].dtype is not dtype: rest = rest.assign(**{col: rest[col].astype(dtype)})
+    master = pd.concat([rest, master], ignore_index=True)
+
+    return master, {"added": added, "modified": modified[modified].index.tolist(), "deleted": deleted}
+
+def merge_change_set(base, changed, change_set, min_id=0):
+    """changed 에 담긴 변경 행(change_set)만 base 에 합친 새 프레임을 만든다 (base 는 수정하지 않음).
+
+    base 가 그사이 다른 세션의 저장으로 바뀌었어도 change_set 에 없는 행은 그대로 유지된다.
+    이미 삭제된 행의 수정은 버리고, 추가 행의 ID 가 base 에 이미 있거나(동시 추가) min_id 보다 작으면 새 ID 를 매긴다.
+    반환: (합친 프레임, 실제로 적용된 change_set)
+    """
+    changed = changed.set_index("_original_id")
+    merged = base[~base["_original_id"].isin(change_set["deleted"])].set_index("_original_id")
+    for col in LABEL_COLUMNS:
+        dtype = label_dtype(col, changed[col])
+        if merged[col].dtype is not dtype: merged[col] = merged[col].astype(dtype)
+        if changed[col].dtype is not dtype: changed[col] = changed[col].astype(dtype)
+    cols = merged.columns.intersection(changed.columns)
+
+    modified = merged.index.intersection(pd.Index(change_set["modified"]))
+    if len(modified):
+        merged.loc[modified, cols] = changed.loc[modified, cols]
+
+    added = changed[changed.index.isin(change_set["added"])]
+    clash = added.index.isin(merged.index) | (added.index < min_id)
+    if clash.any():
+        start = max(int(max(merged.index.max(), added.index.max())) + 1, min_id)
+        new_ids = added.index.to_numpy(dtype="int64").copy()
+        new_ids[clash] = np.arange(start, start + clash.sum())
+        added = added.set_axis(new_ids)
+    merged = pd.concat([merged, added[cols]]).rename_axis("_original_id").reset_index()
+
+    return apply_schema(merged[base.columns]), {
+        "added": [int(i) for i in added.index],
+        "modified": [int(i) for i in modified],
+        "deleted": list(change_set["deleted"]),
+    }
+
+def derived_mismatches(df, today):
+    """증분으로 갱신한 정본 df 가 전체 재계산(to_sheet_frame → process_dataframe)과 같은지 검사.
+    시트 컬럼은 시트 형태로, 남은기간은 값으로, 나머지는 dtype 으로 비교한다. 반환: 다른 곳 설명 목록 (같으면 빈 목록)."""
+    full = process_dataframe(to_sheet_frame(df), today)
+    if len(full) != len(df) or set(full.columns) != set(df.columns):
+        return [f"shape/columns: {df.shape} {list(df.columns)} != {full.shape} {list(full.columns)}"]
+    full = full[df.columns]  # 컬럼 순서는 비교하지 않음
+    problems = [f"dtype {col}: {df[col].dtype} != {full[col].dtype}"
+                for col in df.columns if str(df[col].dtype) != str(full[col].dtype)]
+    a, b = to_sheet_frame(df), to_sheet_frame(full)
+    a["남은기간"], b["남은기간"] = df["남은기간"].to_numpy(), full["남은기간"].to_numpy()
+    diff = (a.astype(str) != b.astype(str)).to_numpy()
+    for row, col in zip(*np.nonzero(diff)):
+        problems.append(f"id {a['_original_id'].iloc[row]} {a.columns[col]}: {a.iat[row, col]!r} != {b.iat[row, col]!r}")
+    return problems
+
+class VocabularyIndex:
+    """라벨 컬럼별 선택지 목록 + 사용 횟수 / 최근 사용일.
+
+    처음 한 번 전체 프레임으로 만들고, 이후에는 저장된 변경 행만 빼고 더해 갱신한다.
+    정렬된 목록은 바뀐 컬럼만 다음 요청 때 다시 만들어 두고 같은 리스트를 돌려준다 (호출하는 쪽은 수정하지 말 것).
+    NaN / 빈 문자열은 선택지에 넣지 않는다.
+    """
+
+    def __init__(self, df):
+        self._lock = threading.Lock()
+        self.counts = {col: {} for col in LABEL_COLUMNS}
+        self.last_used = {col: {} for col in LABEL_COLUMNS}
+        self._sorted, self._ranked = {}, {}
+        self._count(df, 1)
+        self._update_last_used(df)
+
+    @staticmethod
+    def _codes(df, col, only=None):
+        """(행별 라벨 코드, 쓸 행 mask, 코드 → 라벨 Index). NaN / "" 행(only 가 있으면 그 밖의 값인 행)은 mask 에서 빠진다.
+        카테고리 컬럼은 전체 카테고리를 바꾸지 않고 코드 그대로 쓰며, 라벨 문자열은 고유 코드에 대해서만 꺼낸다."""
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            codes, labels = s.cat.codes.to_numpy(), s.cat.categories
+            lookup = (lambda values: label_positions(col, s.dtype, values)) if s.dtype is _label_dtypes[col] else labels.get_indexer
+        else:
+            codes, labels = pd.factorize(s)
+            labels = pd.Index(labels, dtype=object).astype(str)
+            lookup = labels.get_indexer
+        if only is None:
+            keep = codes >= 0
+        else:
+            wanted = lookup(list(only))
+            keep = np.isin(codes, wanted[wanted >= 0])
+        blank = lookup([""])[0]
+        if blank >= 0: keep &= codes != blank
+        return codes, keep, labels
+
+    def _count(self, df, sign):
+        """df 의 라벨 사용 횟수를 더하거나(sign=1) 뺀다. 반환: 컬럼별로 건드린 값 집합."""
+        touched = {}
+        for col in LABEL_COLUMNS:
+            codes, keep, labels = self._codes(df, col)
+            uniq, sizes = np.unique(codes[keep], return_counts=True)
+            touched[col] = values = [str(v) for v in labels.take(uniq)]
+            if not values: continue
+            counts = self.counts[col]
+            for value, n in zip(values, sizes):
+                n = counts.get(value, 0) + sign * int(n)
+                if n > 0: counts[value] = n
+                else: counts.pop(value, None); self.last_used[col].pop(value, None)
+            self._sorted.pop(col, None)
+            self._ranked.pop(col, None)
+        return {col: set(values) for col, values in touched.items()}
+
+    def _update_last_used(self, df, only=None):
+        """df 기준으로 최근 사용일(시작일 최댓값)을 다시 구한다. only: 컬럼별로 다시 구할 값 (None 이면 전부)."""
+        starts = df["시작일"].to_numpy()
+        for col in LABEL_COLUMNS:
+            if only is not None and not only[col]: continue
+            codes, keep, labels = self._codes(df, col, None if only is None else only[col])
+            latest = pd.Series(starts[keep]).groupby(codes[keep]).max().dropna()
+            last_used = self.last_used[col]
+            if only is not None:
+                for value in only[col]: last_used.pop(value, None)  # 남은 행이 없거나 시작일이 모두 빈 값
+            last_used.update(zip((str(v) for v in labels.take(latest.index.to_numpy())), latest))
+            self._ranked.pop(col, None)
+
+    def apply(self, before, after, change_set):
+        """저장 반영: before(저장 전 정본)의 수정/삭제 행을 빼고 after(저장 후 정본)의 추가/수정 행을 더한다.
+        최근 사용일은 늦어지기만 하지 않도록 건드린 값만 after 에서 다시 구한다."""
+        removed = before[before["_original_id"].isin(change_set["modified"] + change_set["deleted"])]
+        added = after[after["_original_id"].isin(change_set["added"] + change_set["modified"])]
+        with self._lock:
+            gone, new = self._count(removed, -1), self._count(added, 1)
+            self._update_last_used(after, {col: gone[col] | new[col] for col in LABEL_COLUMNS})
+
+    def options(self, col):
+        """가나다순 선택지."""
+        with self._lock:
+            if col not in self._sorted: self._sorted[col] = sorted(self.counts[col])
+            return self._sorted[col]
+
+    def ranked(self, col):
+        """최근 사용일(시작일 기준)이 늦은 순, 같으면 많이 쓰인 순, 그래도 같으면 가나다순."""
+        with self._lock:
+            if col not in self._ranked:
+                counts, last_used = self.counts[col], self.last_used[col]
+                oldest = pd.Timestamp.min
+                # 같은 순위는 가나다순 (안정 정렬) — 갱신 순서와 관계없이 새로 만든 인덱스와 같은 순서
+                self._ranked[col] = sorted(sorted(counts), key=lambda v: (last_used.get(v, oldest), counts[v]), reverse=True)
+            return self._ranked[col]
+
+def frame_hash(df):
+    """데이터프레임 내용(컬럼 + 값) 해시."""
+    h = hashlib.sha1("|".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+# -----------------------------------------------------------------------------
+# 완료 업무 보관 (활성 시트는 작게, 완료 업무는 종료 연도별 보관 파티션으로)
+# -----------------------------------------------------------------------------
+ARCHIVE_AFTER_DAYS = 30  # 완료 후 종료일이 이만큼 지난 업무만 보관 (최근 완료 업무는 활성 시트에 남김)
+
+def archivable(df, today):
+    """보관 대상 행 (bool Series): 진행률 100 이고 종료일이 ARCHIVE_AFTER_DAYS 보다 오래된 업무.
+    보관된 ID 는 새 ID 의 하한(min_id, 저장소의 archive_max_id + 1)으로 다시 쓰이지 않는다."""
+    cutoff = pd.Timestamp(today) - timedelta(days=ARCHIVE_AFTER_DAYS)
+    return (df["진행률"] >= 100) & (df["종료일"] < cutoff)
+
+def archive_batches(df, today):
+    """보관 대상 행을 종료 연도별 시트 프레임으로 나눈다. 반환: {연도: to_sheet_frame 형태 프레임}"""
+    rows = df[archivable(df, today)]
+    return {int(year): to_sheet_frame(part) for year, part in rows.groupby(rows["종료일"].dt.year)}
+
+# -----------------------------------------------------------------------------
+# 선행 업무 (finish-to-start 의존) 와 일정 전파
+# -----------------------------------------------------------------------------
+# '선행업무' 값: 선행 업무 ID 를 쉼표로 나열, ID 뒤 +N / -N 은 지연(앞당김) 영업일. 예) "12, 15+2"
+DEPENDENCY_PATTERN = r"(?P<pred>\d+)\s*(?:(?P<sign>[+-])\s*(?P<lag>\d+))?"
+
+def _normalize_dependency(value):
+    if isinstance(value, (int, float, np.number)):  # 시트에서 숫자 하나로 읽힌 값 (예: 12.0)
+        return "" if pd.isna(value) else str(int(value))
+    if pd.isna(value): return ""
+    tokens = pd.Series([str(value)]).str.extractall(DEPENDENCY_PATTERN)
+    return ", ".join(pred + (f"{sign}{int(lag)}" if pd.notna(lag) and int(lag) else "")
+                     for pred, sign, lag in tokens.itertuples(index=False))
+
+def normalize_dependencies(values):
+    """'선행업무' 값을 "ID[+지연]" 을 쉼표로 이은 표준 문자열로 정리 (빈 값은 ""). 고유값만 변환한다."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    labels = np.array([_normalize_dependency(v) for v in uniques] + [""], dtype=object)
+    return pd.Series(labels[codes], index=getattr(values, "index", None), dtype=object)
+
+def _parse_dependencies(df):
+    """'선행업무' 컬럼 → 의존 관계 프레임 (pred, succ, lag). 선행 ID 가 df 에 있는지는 보지 않는다."""
+    ids = pd.to_numeric(df["_original_id"], errors='coerce').to_numpy(dtype="int64")
+    deps = df["선행업무"].astype(object).fillna("").astype(str).reset_index(drop=True)
+    deps = deps[deps != ""]
+    if deps.empty: return pd.DataFrame({"pred": [], "succ": [], "lag": []}, dtype="int64")
+    single = deps.str.fullmatch(r"\d+")  # 가장 흔한 "ID 하나" 는 정규식 추출 없이 바로 변환
+    found = deps[~single].str.extractall(DEPENDENCY_PATTERN)
+    lag = pd.to_numeric(found["lag"]).fillna(0).to_numpy(dtype="int64")
+    edges = pd.DataFrame({
+        "pred": np.concatenate([deps[single].astype("int64").to_numpy(), found["pred"].astype("int64").to_numpy()]),
+        "succ": ids[np.concatenate([deps.index[single], found.index.get_level_values(0)]).astype("int64")],
+        "lag": np.concatenate([np.zeros(single.sum(), dtype="int64"), np.where(found["sign"].to_numpy() == "-", -lag, lag)]),
+    })
+    return edges.drop_duplicates(["pred", "succ"], keep="last")
+
+def dependency_edges(df):
+    """'선행업무' 컬럼 → 의존 관계 프레임 (pred, succ, lag). 없는 업무를 가리키는 선행 ID 는 무시한다."""
+    return DependencyIndex(df).edges(df)
+
+class DependencyIndex:
+    """'선행업무' 에서 뽑은 선행 관계 (정본 버전마다 공유).
+
+    전체 컬럼은 처음 한 번만 파싱하고, 저장할 때는 change_set 업무의 관계만 다시 파싱해 바꿔 끼운다.
+    없는 업무를 가리키는 관계도 남겨 두고 edges() 에서 그 프레임에 있는 선행 업무만 고른다 (선행 업무가 지워지거나 다시 생겨도 맞음).
+    updated() 는 새 객체를 돌려주므로 이전 인덱스를 읽는 세션에 영향이 없다.
+    """
+
+    def __init__(self, df):
+        self.parsed = _parse_dependencies(df)
+
+    def updated(self, df, change_set):
+        """change_set 업무의 관계만 df(변경이 반영된 프레임)에서 다시 파싱한 새 인덱스."""
+        touched = pd.Index(change_set["modified"] + change_set["deleted"] + change_set["added"]).astype("int64")
+        rows = df[pd.to_numeric(df["_original_id"], errors='coerce').isin(touched)]
+        new = object.__new__(DependencyIndex)
+        new.parsed = pd.concat([self.parsed[~self.parsed["succ"].isin(touched)], _parse_dependencies(rows)], ignore_index=True)
+        return new
+
+    def edges(self, df):
+        """df 의 업무를 선행으로 가리키는 관계만 (pred, succ, lag)."""
+        ids = pd.to_numeric(df["_original_id"], errors='coerce')
+        return self.parsed[self.parsed["pred"].isin(ids)].reset_index(drop=True)
+
+class DependencyCycleError(ValueError):
+    """선행 관계가 순환한다. cycle: 순환을 이루는 ID 목록 (선행 → 후행 순)."""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__("순환 의존: " + " → ".join(map(str, cycle + cycle[:1])))
+
+def _find_cycle(edges, nodes):
+    """위상 정렬에서 남은 nodes 안의 순환 하나. 남은 노드는 모두 남은 선행 노드를 가지므로 선행 쪽으로 따라가면 반드시 되돌아온다."""
+    inner = edges[edges["pred"].isin(nodes) & edges["succ"].isin(nodes)]
+    pred_of = inner.groupby("succ")["pred"].first().to_dict()
+    seen, path, node = {}, [], min(nodes)
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = pred_of[node]
+    return [int(i) for i in path[seen[node]:][::-1]]
+
+def _adjacency(edges):
+    """{선행 ID: [후행 ID, ...]}"""
+    out = {}
+    for pred, succ in zip(edges["pred"].tolist(), edges["succ"].tolist()):
+        out.setdefault(pred, []).append(succ)
+    return out
+
+def _reachable(edges, start):
+    """start 와 그 후행 업무 전체의 ID 집합. 전체 관계로 딕셔너리를 만들지 않고 pred 순으로 정렬한 배열에서 층마다 한 번에 찾는다."""
+    pred, succ = edges["pred"].to_numpy(dtype="int64"), edges["succ"].to_numpy(dtype="int64")
+    order = np.argsort(pred, kind="stable")
+    pred, succ = pred[order], succ[order]
+    seen = {int(i) for i in start}
+    frontier = np.fromiter(seen, dtype="int64", count=len(seen))
+    while len(frontier):
+        lo, hi = np.searchsorted(pred, frontier, side="left"), np.searchsorted(pred, frontier, side="right")
+        counts = hi - lo
+        found = succ[np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+        frontier = np.array([i for i in np.unique(found).tolist() if i not in seen], dtype="int64")
+        seen.update(frontier.tolist())
+    return seen
+
+def reschedule(df, changed_ids, edges=None):
+    """changed_ids 업무의 날짜 변경을 후행 업무로 전파 (finish-to-start + 지연 영업일).
+
+    changed_ids 와 그 후행 업무(영향 받는 부분 그래프)만 위상 순서대로 층별 일괄 계산한다. 각 업무는 모든 선행 업무의
+    종료일 다음 영업일 + 지연보다 먼저 시작하지 않도록 뒤로 밀리고 작업기간(영업일)은 유지된다.
+    이미 제약을 만족하는 업무는 앞당기지 않고, 완료(진행률 100)했거나 종료일이 빈 업무는 옮기지 않는다.
+    순환 의존이 있으면 DependencyCycleError. edges: 이미 구한 df 의 관계 (DependencyIndex.edges, 없으면 df 전체를 파싱).
+    반환: (반영된 프레임, 날짜가 바뀐 ID 목록)
+    """
+    if edges is None: edges = dependency_edges(df)
+    if edges.empty or not len(changed_ids): return df, []
+
+    affected = _reachable(edges, changed_ids)
+    edges = edges[edges["succ"].isin(affected)]  # 부분 그래프 밖의 선행 업무는 고정된 날짜로만 참여
+    inner = edges[edges["pred"].isin(affected)]
+    indegree = inner["succ"].value_counts().to_dict()
+    inner_succ = _adjacency(inner)
+
+    cal = get_calendar()
+    ids = pd.to_numeric(df["_original_id"], errors='coerce').to_numpy(dtype="int64")
+    pos = pd.Series(np.arange(len(df)), index=ids)
+    pos = pos[~pos.index.duplicated()]
+    start, end = cal._as_days(df["시작일"]), cal._as_days(df["종료일"])
+    duration = cal.busday_count(start, end)
+    fixed = (pd.to_numeric(df["진행률"], errors='coerce').fillna(0).to_numpy() >= 100) | np.isnat(end)  # 옮기지 않는 업무
+    # 층마다 pandas 연산을 반복하지 않도록 관계를 행 위치 배열로 바꿔 둔다
+    pred_rows, succ_rows = pos[edges["pred"]].to_numpy(), pos[edges["succ"]].to_numpy()
+    lags = edges["lag"].to_numpy()
+    nat = np.datetime64("NaT", "D").astype(np.int64)
+    in_layer = np.zeros(len(df), dtype=bool)
+
+    moved, done = set(), 0
+    layer = [n for n in affected if n not in indegree]
+    while layer:
+        done += len(layer)
+        layer_rows = pos[layer].to_numpy()
+        in_layer[layer_rows] = True
+        m = in_layer[succ_rows]
+        in_layer[layer_rows] = False
+        if m.any():
+            earliest = cal.next_start(end[pred_rows[m]], lags[m]).astype(np.int64)
+            bound = np.full(len(df), nat, dtype=np.int64)  # NaT 는 int64 최솟값이라 최댓값 계산에서 자연히 빠짐
+            np.maximum.at(bound, succ_rows[m], earliest)
+            rows = np.unique(succ_rows[m])
+            late = (bound[rows] != nat) & ~np.isnat(start[rows]) & ~fixed[rows] & (start[rows].astype(np.int64) < bound[rows])
+            if late.any():
+                rows = rows[late]
+                start[rows] = bound[rows].astype("datetime64[D]")
+                end[rows] = cal.busday_offset(start[rows], duration[rows])
+                moved.update(int(i) for i in ids[rows])
+        next_layer = []
+        for node in layer:
+            for succ in inner_succ.get(node, ()):
+                indegree[succ] -= 1
+                if indegree[succ] == 0: next_layer.append(succ)
+        layer = next_layer
+    if done < len(affected):
+        raise DependencyCycleError(_find_cycle(inner, {n for n, d in indegree.items() if d > 0}))
+    if not moved: return df, []
+
+    rows = pos[sorted(moved)].to_numpy()
+    out = df.copy()
+    out.iloc[rows, out.columns.get_loc("시작일")] = pd.to_datetime(start[rows])
+    out.iloc[rows, out.columns.get_loc("종료일")] = pd.to_datetime(end[rows])
+    return out, sorted(moved)
+
+# -----------------------------------------------------------------------------
+# 업무 리스트 필터 / 페이지 나누기
+# -----------------------------------------------------------------------------
+EDITOR_PAGE_SIZES = [50, 100, 200]
+
+class TaskFilterIndex:
+    """업무 리스트의 서버 측 필터/정렬 인덱스 (정본 버전마다 한 번 생성, 세션 간 공유).
+
+    라벨은 카테고리 코드로 비교하고, 검색어는 라벨 고유값(카테고리)에서 먼저 찾은 뒤 코드로 행을 고른다.
+    기간은 TaskIntervalIndex 로 찾고, 정렬 순서는 (컬럼, 방향)별로 처음 요청할 때 한 번 계산해 둔다.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._codes = {col: df[col].cat.codes.to_numpy() for col in LABEL_COLUMNS}
+        self._categories = {col: df[col].cat.categories for col in LABEL_COLUMNS}
+        self._ids = df["_original_id"].to_numpy()
+        self._done = df["진행률"].to_numpy() >= 100
+        self._lower, self._orders = {}, {}
+        self._intervals = None
+
+    def _label_mask(self, col, values):
+        wanted = self._categories[col].get_indexer(list(values))
+        return np.isin(self._codes[col], wanted[wanted >= 0])
+
+    def _text_mask(self, text):
+        """라벨 4종 중 하나에 text 가 들어 있거나(대소문자 무시) ID 가 text 인 행."""
+        text = text.strip().lower()
+        mask = self._ids == int(text) if text.isdigit() else np.zeros(len(self.df), dtype=bool)
+        for col in LABEL_COLUMNS:
+            if col not in self._lower: self._lower[col] = self._categories[col].astype(str).str.lower()
+            hits = np.flatnonzero(self._lower[col].str.contains(text, regex=False))
+            if hits.size: mask |= np.isin(self._codes[col], hits)
+        return mask
+
+    def query(self, members=(), projects=(), period=None, text="", include_completed=True):
+        """조건을 모두 만족하는 행 (bool 배열, 원본 프레임 순서). period: (시작, 끝) — 이 기간과 겹치는 업무."""
+        mask = np.ones(len(self.df), dtype=bool)
+        if not include_completed: mask &= ~self._done
+        if members: mask &= self._label_mask("담당자", members)
+        if projects: mask &= self._label_mask("프로젝트명", projects)
+        if period:
+            if self._intervals is None: self._intervals = TaskIntervalIndex(self.df)
+            in_period = np.zeros(len(self.df), dtype=bool)
+            in_period[self._intervals.overlapping(*period)] = True
+            mask &= in_period
+        if text.strip(): mask &= self._text_mask(text)
+        return mask
+
+    def order(self, col, ascending):
+        """col 기준 정렬 순서 (행 위치 배열). 같은 값은 원래 순서를 유지하고 빈 값은 끝에 둔다."""
+        key = (col, ascending)
+        if key not in self._orders:
+            values = self.df[col].reset_index(drop=True)
+            self._orders[key] = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+        return self._orders[key]
+
+    def page(self, mask, col, ascending, page, page_size):
+        """정렬된 결과 중 page 번째(0부터) 페이지의 행 위치와 전체 결과 수."""
+        order = self.order(col, ascending)
+        hits = order[mask[order]]
+        return hits[page * page_size:(page + 1) * page_size], len(hits)
+
+# -----------------------------------------------------------------------------
+# 담당자별 업무 부하
+# -----------------------------------------------------------------------------
+WORKLOAD_DAYS_BEFORE = 90    # 부하 행렬이 미리 계산해 두는 범위 (오늘 기준, 일)
+WORKLOAD_DAYS_AFTER = 365
+
+class WorkloadMatrix:
+    """담당자 × 영업일 부하 행렬 (칸 값 = 그날 진행 중인 미완료 업무 수).
+
+    업무마다 (담당자 행, 시작 열, 끝 열+1) 구간만 기록하고, 차분 배열에 +1/-1 을 찍은 뒤 누적합으로 행렬을 만든다.
+    일부 행만 바뀌면 그 업무들의 기존 구간을 빼고 새 구간을 더한 차분만 누적해 반영한다.
+    updated() 는 새 객체를 돌려주므로 이전 행렬을 읽는 세션에 영향이 없다.
+    """
+
+    def __init__(self, df, range_start, range_end):
+        self.days = get_calendar().business_days(range_start, range_end)
+        # 요청 범위 (days 는 영업일만이라 양 끝이 주말/공휴일이면 days[0]/days[-1] 과 다름)
+        self.range = (np.datetime64(pd.Timestamp(range_start), "D"), np.datetime64(pd.Timestamp(range_end), "D"))
+        self.members = []
+        self.load = np.zeros((0, len(self.days)), dtype=np.int32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.member_pos = np.empty(0, dtype=np.int64)
+        self.lo = np.empty(0, dtype=np.int64)
+        self.hi = np.empty(0, dtype=np.int64)
+        self._add(df)
+
+    def covers(self, start, end):
+        return self.range[0] <= np.datetime64(pd.Timestamp(start), "D") and np.datetime64(pd.Timestamp(end), "D") <= self.range[1]
+
+    def _spans(self, df):
+        """df 의 미완료 업무를 (ID, 담당자 위치, 시작 열, 끝 열+1) 배열로. 범위 밖이거나 날짜가 빈 업무는 제외."""
+        df = df[(df["진행률"] < 100) & df["담당자"].notna() & (df["담당자"].astype(str) != "")]
+        starts = df["시작일"].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        ends = df["종료일"].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        lo = np.searchsorted(self.days, starts, side="left")
+        hi = np.searchsorted(self.days, ends, side="right")
+        keep = ~np.isnat(starts) & ~np.isnat(ends) & (lo < hi)
+        members = df["담당자"].astype(str).to_numpy()[keep]
+        pos = pd.Index(self.members).get_indexer(members)
+        new_members = pd.unique(members[pos < 0])
+        if len(new_members):
+            self.members = self.members + list(new_members)
+            self.load = np.vstack([self.load, np.zeros((len(new_members), len(self.days)), dtype=np.int32)])
+            pos = pd.Index(self.members).get_indexer(members)
+        return df["_original_id"].to_numpy(dtype=np.int64)[keep], pos.astype(np.int64), lo[keep], hi[keep]
+
+    def _accumulate(self, pos, lo, hi, sign):
+        diff = np.zeros((len(self.members), len(self.days) + 1), dtype=np.int32)
+        np.add.at(diff, (pos, lo), sign)
+        np.add.at(diff, (pos, hi), -sign)
+        self.load = self.load + np.cumsum(diff[:, :-1], axis=1, dtype=np.int32)
+
+    def _add(self, df):
+        ids, pos, lo, hi = self._spans(df)
+        self._accumulate(pos, lo, hi, 1)
+        self.ids = np.concatenate([self.ids, ids])
+        self.member_pos = np.concatenate([self.member_pos, pos])
+        self.lo = np.concatenate([self.lo, lo])
+        self.hi = np.concatenate([self.hi, hi])
+
+    def updated(self, df, change_set):
+        """change_set 의 업무만 다시 반영한 새 행렬. df 는 변경이 반영된 최신 프레임."""
+        new = object.__new__(WorkloadMatrix)
+        new.__dict__.update(self.__dict__)
+        touched = pd.Index(change_set["modified"] + change_set["deleted"] + change_set["added"]).astype("int64")
+        gone = np.isin(self.ids, touched)
+        if gone.any():
+            new._accumulate(self.member_pos[gone], self.lo[gone], self.hi[gone], -1)
+            new.ids, new.member_pos, new.lo, new.hi = self.ids[~gone], self.member_pos[~gone], self.lo[~gone], self.hi[~gone]
+        new._add(df[df["_original_id"].isin(touched)])
+        return new
+
+    def window(self, start, end):
+        """start~end 영업일 구간에 부하가 있는 담당자만 (담당자 목록, 날짜 배열, 부하 행렬)."""
+        cols = slice(np.searchsorted(self.days, np.datetime64(pd.Timestamp(start), "D"), side="left"),
+                     np.searchsorted(self.days, np.datetime64(pd.Timestamp(end), "D"), side="right"))
+        load = self.load[:, cols]
+        rows = np.flatnonzero(load.any(axis=1))
+        rows = rows[np.argsort(np.asarray(self.members, dtype=object)[rows], kind="stable")]
+        return [self.members[i] for i in rows], self.days[cols], load[rows]
+
+def build_workload_figure(members, days, load, force_print_theme, view_start, view_end):
+    """담당자별 부하 히트맵 (Heatmap trace 하나). x 축 범위는 간트차트와 같은 기간을 쓴다."""
+    import plotly.graph_objects as go
+
+    # 주말/공휴일 칸은 비워 두어 칸 폭이 간트차트의 하루와 같도록 달력 날짜 전체로 펼침
+    dates = pd.date_range(view_start, view_end, freq="D")
+    z = np.full((len(members), len(dates)), np.nan)
+    cols = (days - np.datetime64(dates[0], "D")).astype(np.int64)
+    inside = (cols >= 0) & (cols < len(dates))
+    z[:, cols[inside]] = load[:, inside]
+    fig = go.Figure(go.Heatmap(
+        x=dates + timedelta(hours=12), y=members, z=z,
+        colorscale="YlOrRd", zmin=0, zmax=max(3, int(load.max()) if load.size else 0),
+        xgap=1, ygap=1,
+        customdata=np.broadcast_to(dates.strftime("%m/%d").to_numpy(dtype=object), z.shape),
+        hovertemplate="<b>%{y}</b><br>%{customdata}: %{z}건<extra></extra>",
+        colorbar=dict(title="건", thickness=12),
+    ))
+    layout_bg = "white" if force_print_theme else None
+    fig.update_xaxes(type="date", range=[view_start, view_end], side="top",
+                     tickfont=dict(size=FONT_SIZE_DATE, color="black", family="Arial"))
+    fig.update_yaxes(autorange="reversed", tickfont=dict(size=FONT_SIZE_TEXT, color="black", family="Arial"))
+    fig.update_layout(
+        height=max(200, len(members) * 26 + 60),
+        margin=dict(l=10, r=10, t=40, b=10),
+        font=dict(color="black", family="Arial"),
+        paper_bgcolor=layout_bg, plot_bgcolor=layout_bg,
+        dragmode="pan"
+    )
+    return fig
+
+# -----------------------------------------------------------------------------
+# 간트차트
+# -----------------------------------------------------------------------------
+def wrap_labels(text, width=15):
+    if pd.isna(text) or text == "": return ""
+    return "<br>".join(textwrap.wrap(str(text), width=width, break_long_words=True))
+
+GANTT_VIEW_BEFORE = 5     # 오늘 기준 화면 시작 (일)
+GANTT_VIEW_AFTER = 20     # 오늘 기준 화면 끝 (일)
+GANTT_WINDOW_STEP = 21    # 이전/다음 이동 간격이자 화면 밖 여유 구간 (일)
+GANTT_ROW_OPTIONS = [18, 30, 50]
+# plotly.express.colors.qualitative.Pastel (팔레트 하나 때문에 plotly.express 를 불러오지 않도록 복사)
+PASTEL_COLORS = [
+    'rgb(102, 197, 204)', 'rgb(246, 207, 113)', 'rgb(248, 156, 116)', 'rgb(220, 176, 242)',
+    'rgb(135, 197, 95)', 'rgb(158, 185, 243)', 'rgb(254, 136, 177)', 'rgb(201, 219, 116)',
+    'rgb(139, 224, 164)', 'rgb(180, 151, 231)', 'rgb(179, 179, 179)',
+]
+
+class TaskIntervalIndex:
+    """시작일/종료일 구간 인덱스.
+
+    시작일 순으로 정렬한 배열과 누적 최대 종료일을 두고, 주어진 기간과 겹치는 업무를 이진 탐색으로 찾는다.
+    기간보다 먼저 모두 끝난 앞부분과 기간 이후에 시작하는 뒷부분은 검사하지 않는다.
+    """
+
+    def __init__(self, df):
+        starts = df["시작일"].to_numpy(dtype="datetime64[ns]")
+        ends = df["종료일"].to_numpy(dtype="datetime64[ns]")
+        rows = np.flatnonzero(~np.isnat(starts) & ~np.isnat(ends))
+        order = np.argsort(starts[rows], kind="stable")
+        self.rows = rows[order]
+        self.starts = starts[self.rows]
+        self.ends = ends[self.rows]
+        self.max_end = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def overlapping(self, window_start, window_end):
+        """기간과 겹치는 업무의 행 위치(원본 프레임 기준, 원래 순서)."""
+        ws = np.datetime64(pd.Timestamp(window_start), "ns")
+        we = np.datetime64(pd.Timestamp(window_end), "ns")
+        hi = np.searchsorted(self.starts, we, side="right")
+        lo = np.searchsorted(self.max_end[:hi], ws, side="left")
+        hits = self.rows[lo:hi][self.ends[lo:hi] >= ws]
+        return np.sort(hits)
+
+def build_gantt_figure(chart_data, show_completed, force_print_theme, is_dark_mode, today, view_start, view_end):
+    """간트차트 Figure 생성 (현재 시각 표시선 제외).
+    show_completed/is_dark_mode/today 는 그림에 직접 쓰이지 않아도 캐시 키로 함께 전달된다."""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    chart_data = as_plain_labels(chart_data.sort_values(by=["프로젝트명", "시작일"], ascending=[True, True]).reset_index(drop=True))
+    
+    proj_display_list = []
+    prev_proj = None
+    for proj in chart_data["프로젝트명"]:
+        if proj == prev_proj: proj_display_list.append("") 
+        else: proj_display_list.append(proj); prev_proj = proj
+    
+    chart_data["프로젝트명_표시"] = [wrap_labels(p, 12) for p in proj_display_list]
+    chart_data["Activity_표시"] = chart_data["Activity"].apply(lambda x: wrap_labels(x, 12))
+    
+    unique_members = chart_data["담당자"].unique()
+    colors = PASTEL_COLORS
+    color_map = {member: colors[i % len(colors)] for i, member in enumerate(unique_members)}
+    
+    header_style = f"font-size:{FONT_SIZE_TEXT}pt; color:black; font-family:Arial"
+    
+    fig = make_subplots(
+        rows=1, cols=5,
+        shared_yaxes=True,
+        horizontal_spacing=0.005, 
+        column_widths=[0.10, 0.05, 0.05, 0.10, 0.70], 
+        subplot_titles=(
+            f"<b><span style='{header_style}'>프로젝트명</span></b>", 
+            f"<b><span style='{header_style}'>구분</span></b>", 
+            f"<b><span style='{header_style}'>담당자</span></b>", 
+            f"<b><span style='{header_style}'>Activity</span></b>", 
+            ""
+        ),
+        specs=[[{"type": "scatter"}, {"type": "scatter"}, {"type": "scatter"}, {"type": "scatter"}, {"type": "xy"}]]
+    )
+
+    num_rows = len(chart_data)
+    y_axis = list(range(num_rows))
+    
+    common_props = dict(
+        mode="text", 
+        textposition="middle center", 
+        textfont=dict(color="black", size=FONT_SIZE_TEXT, family="Arial"), 
+        hoverinfo="skip"
+    )
+
+    fig.add_trace(go.Scatter(x=[0.5]*num_rows, y=y_axis, text=chart_data["프로젝트명_표시"], **common_props), row=1, col=1)
+    fig.add_trace(go.Scatter(x=[0.5]*num_rows, y=y_axis, text=chart_data["구분"], **common_props), row=1, col=2)
+    fig.add_trace(go.Scatter(x=[0.5]*num_rows, y=y_axis, text=chart_data["담당자"], **common_props), row=1, col=3)
+    fig.add_trace(go.Scatter(x=[0.5]*num_rows, y=y_axis, text=chart_data["Activity_표시"], **common_props), row=1, col=4)
+
+    bar_start = chart_data["시작일"]
+    bar_end = chart_data["종료일"]
+    duration_ms = ((bar_end - bar_start).dt.days + 1) * 24 * 3600 * 1000
+    work_days = pd.Series(get_calendar().busday_count(bar_start, bar_end), index=chart_data.index).astype(str)
+    bar_text = work_days + "일 / " + chart_data["진행률"].astype(str) + "%"
+    bar_hover = (
+        "<b>" + chart_data["프로젝트명"].fillna("").astype(str) + "</b><br>" + chart_data["Activity"].fillna("").astype(str)
+        + "<br>" + bar_start.dt.strftime('%Y-%m-%d') + " ~ " + bar_end.dt.strftime('%Y-%m-%d')
+        + "<br>작업일: " + work_days + "일"
+    )
+
+    fig.add_trace(go.Bar(
+        base=bar_start,
+        x=duration_ms,
+        y=y_axis,
+        orientation='h',
+        marker_color=chart_data["담당자"].map(color_map).fillna("grey"),
+        opacity=0.8,
+        hoverinfo="text",
+        hovertext=bar_hover,
+        text=bar_text, textposition='inside', insidetextanchor='middle',
+        textfont=dict(color='black', size=FONT_SIZE_TEXT, family="Arial"),
+        showlegend=False
+    ), row=1, col=5)
+
+    calc_start = view_start - timedelta(days=GANTT_WINDOW_STEP)
+    calc_end = view_end + timedelta(days=GANTT_WINDOW_STEP)
+
+    holiday_fill_color = "rgba(0, 0, 0, 0.05)"
+    holiday_text_color = "rgba(0, 0, 0, 0.5)" 
+    grid_color = "rgba(128, 128, 128, 0.2)"
+
+    row_edges = [i - 0.5 for i in range(num_rows + 1)]
+    day_map = {0: '월', 1: '화', 2: '수', 3: '목', 4: '금', 5: '토', 6: '일'}
+    
+    tick_days = pd.date_range(calc_start, calc_end, freq="D")
+    holiday_mask = get_calendar().is_holiday(tick_days)
+    tick_vals = tick_days + timedelta(hours=12)
+    tick_text = pd.Series(
+        tick_days.month.astype(str) + "/" + tick_days.day.astype(str) + "<br>" + tick_days.weekday.map(day_map)
+    )
+    tick_text[holiday_mask] = "<span style='color:" + holiday_text_color + "'>" + tick_text[holiday_mask] + "</span>"
+
+    # 연속된 휴일(주말+공휴일)을 한 구간으로 묶어 구간마다 막대 아래(layer="below") 사각형 하나로 그림
+    # (shape 수는 표시 기간의 휴일 구간 수에만 비례, add_shape 대신 dict 로 한 번에 추가)
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], holiday_mask.astype(np.int8), [0]])))
+    span_x0 = tick_days[edges[0::2]]
+    span_x1 = tick_days[edges[1::2] - 1] + timedelta(days=1)
+    gantt = fig.get_subplot(1, 5)
+    xref, yref = gantt.xaxis.plotly_name.replace("axis", ""), gantt.yaxis.plotly_name.replace("axis", "")
+    fig.layout.shapes += tuple(
+        dict(type="rect", xref=xref, yref=f"{yref} domain", x0=x0, x1=x1, y0=0, y1=1,
+             fillcolor=holiday_fill_color, line_width=0, layer="below")
+        for x0, x1 in zip(span_x0, span_x1)
+    )
+
+    # 행 구분선은 y축 격자, 일자 구분선은 x축 보조 격자로 그려 shape 수가 데이터에 비례하지 않도록 함
+    row_grid = dict(showgrid=True, gridcolor=grid_color, gridwidth=1, tickmode="array", tickvals=row_edges)
+
+    for i in range(1, 5):
+        fig.update_xaxes(showgrid=False, zeroline=False, showticklabels=False, row=1, col=i)
+        fig.update_yaxes(zeroline=False, showticklabels=False, autorange="reversed", **row_grid, row=1, col=i)
+
+    fig.update_xaxes(
+        type="date", 
+        range=[view_start, view_end], 
+        side="top",
+        tickfont=dict(size=FONT_SIZE_DATE, color="black", family="Arial"),
+        tickvals=tick_vals,
+        ticktext=tick_text.tolist(),
+        showgrid=False,
+        minor=dict(tick0=calc_start, dtick=24 * 3600 * 1000, showgrid=True, gridcolor=grid_color, gridwidth=1, griddash="dash"),
+        zeroline=False,
+        row=1, col=5
+    )
+    fig.update_yaxes(showticklabels=False, fixedrange=True, autorange="reversed", **row_grid, row=1, col=5)
+    
+    layout_bg = "white" if force_print_theme else None
+    
+    calculated_height = num_rows * 30 + 70
+    final_height = max(400, calculated_height)
+    
+    fig.update_layout(
+        height=final_height,
+        margin=dict(l=10, r=10, t=60, b=10), 
+        title={
+            'text': f"<b>HL Design 1DV 1Team Project Schedule</b>",
+            'y': 0.99, 'x': 0.05, 'xanchor': 'left', 'yanchor': 'top', 
+            'pad': dict(b=20), 
+            'font': dict(color="black", size=FONT_SIZE_TITLE, family="Arial")
+        },
+        font=dict(color="black", family="Arial"),
+        paper_bgcolor=layout_bg, 
+        plot_bgcolor=layout_bg,
+        showlegend=False, 
+        dragmode="pan"
+    )
+    return fig
+
+# -----------------------------------------------------------------------------
+# 인쇄용 내보내기 (서버에서 정적 이미지/PDF 생성)
+# -----------------------------------------------------------------------------
+EXPORT_PAGE_SIZE = (1600, 1131)  # A4 가로 비율 (px)
+EXPORT_GANTT_ROWS = 30           # 페이지당 간트차트 행 수
+EXPORT_TABLE_ROWS = 36           # 페이지당 업무 리스트 행 수
+EXPORT_TABLE_COLUMNS = ["프로젝트명", "구분", "담당자", "Activity", "작업기간", "시작일", "종료일", "진행률"]
+
+def paginate(df, rows_per_page):
+    """rows_per_page 행씩 나눈 페이지 목록 (빈 프레임이면 빈 목록)."""
+    return [df.iloc[i:i + rows_per_page] for i in range(0, len(df), rows_per_page)]
+
+def build_task_table_figure(rows, title):
+    """업무 리스트 한 페이지 (인쇄용 흰 배경 Table)."""
+    import plotly.graph_objects as go
+
+    rows = as_plain_labels(rows[EXPORT_TABLE_COLUMNS])
+    cells = [rows[col].fillna("").astype(str) for col in ["프로젝트명", "구분", "담당자", "Activity"]]
+    cells += [rows["작업기간"].astype(str) + "일"]
+    cells += [rows[col].dt.strftime("%Y-%m-%d").fillna("") for col in ["시작일", "종료일"]]
+    cells += [rows["진행률"].astype(str) + "%"]
+    fig = go.Figure(go.Table(
+        columnwidth=[3, 2, 2, 5, 1.5, 2, 2, 1.5],
+        header=dict(values=[f"<b>{c}</b>" for c in EXPORT_TABLE_COLUMNS], fill_color="rgb(230, 230, 230)",
+                    font=dict(color="black", size=FONT_SIZE_TEXT + 2, family="Arial"), align="center", height=30),
+        cells=dict(values=cells, fill_color="white", line_color="rgb(200, 200, 200)",
+                   font=dict(color="black", size=FONT_SIZE_TEXT + 1, family="Arial"), align="left", height=28),
+    ))
+    fig.update_layout(
+        title=dict(text=f"<b>{title}</b>", x=0.02, font=dict(color="black", size=FONT_SIZE_TITLE, family="Arial")),
+        margin=dict(l=20, r=20, t=60, b=20), paper_bgcolor="white", height=len(rows) * 28 + 120,
+    )
+    return fig
+
+def render_pages(figures, fmt):
+    """Figure 목록을 페이지로 렌더링. fmt="pdf" 면 여러 페이지 PDF, "png" 면 페이지별 PNG 를 묶은 zip 의 bytes.
+    plotly 정적 이미지 변환에 kaleido 가 필요하다."""
+    import io
+    import zipfile
+    from PIL import Image
+
+    width, height = EXPORT_PAGE_SIZE
+    pages = []
+    for fig in figures:
+        png = fig.to_image(format="png", width=width, height=min(height, fig.layout.height or height))
+        page = Image.new("RGB", EXPORT_PAGE_SIZE, "white")  # 마지막 페이지처럼 짧은 그림도 같은 크기의 페이지 위쪽에 배치
+        page.paste(Image.open(io.BytesIO(png)).convert("RGB"), (0, 0))
+        pages.append(page)
+
+    buf = io.BytesIO()
+    if fmt == "pdf":
+        pages[0].save(buf, format="PDF", save_all=True, append_images=pages[1:], resolution=150)
+    else:
+        with zipfile.ZipFile(buf, "w") as zf:
+            for i, page in enumerate(pages, start=1):
+                png = io.BytesIO()
+                page.save(png, format="PNG")
+                zf.writestr(f"page_{i:02d}.png", png.getvalue())
+    return buf.getvalue()
+
+def export_schedule(chart_data, table_data, today, view_start, view_end, fmt):
+    """간트차트(인쇄용 테마)와 업무 리스트를 페이지로 나눠 PDF 또는 PNG(zip) 로 렌더링."""
+    chart_data = chart_data.sort_values(by=["프로젝트명", "시작일"])
+    table_data = table_data.sort_values(by=["프로젝트명", "시작일"])
+    gantt_pages = paginate(chart_data, EXPORT_GANTT_ROWS)
+    table_pages = paginate(table_data, EXPORT_TABLE_ROWS)
+    total = len(gantt_pages) + len(table_pages)
+    figures = []
+    for i, page in enumerate(gantt_pages, start=1):
+        fig = build_gantt_figure(page, True, True, False, today, view_start, view_end)
+        fig.update_layout(title_text=f"<b>HL Design 1DV 1Team Project Schedule</b> ({view_start:%Y-%m-%d} ~ {view_end:%Y-%m-%d}, {i}/{total})")
+        figures.append(fig)
+    for i, page in enumerate(table_pages, start=len(gantt_pages) + 1):
+        figures.append(build_task_table_figure(page, f"업무 리스트 ({i}/{total})"))
+    if not figures: raise ValueError("내보낼 일정이 없습니다.")
+    return render_pages(figures, fmt)
@@ -0,0 +1,411 @@
+"""일정 데이터 저장소 (구글 시트 / 로컬 SQLite).
+
+app.py 는 StorageBackend 인터페이스만 사용하고, 어떤 저장소를 쓸지는 설정으로 고른다.
+
+    # .streamlit/secrets.toml            (환경변수 SCHEDULE_STORAGE / SCHEDULE_SQLITE_PATH 가 있으면 우선)
+    [storage]
+    backend = "sqlite"                   # "gsheets"(기본) 또는 "sqlite"
+    path = "schedule.db"
+
+모든 저장소는 to_sheet_frame 형태(SHEET_COLUMNS, 날짜는 문자열)의 프레임을 주고받으며,
+같은 계약(benchmarks/storage_contract.py)을 통과해야 한다.
+"""
+import atexit
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from schedule_core import SHEET_COLUMNS
+
+class StorageBackend:
+    """저장소 인터페이스.
+
+    read()          : 전체 행 (to_sheet_frame 이전의 원본 형태여도 됨 — 호출하는 쪽에서 정리)
+    get_rows(ids)   : _original_id 가 ids 인 행만
+    write_changes() : change_set({"added", "modified", "deleted"}) 의 행만 반영. 없는 ID 의 수정은 추가로 처리
+    replace_all()   : 전체 덮어쓰기
+    snapshot_name   : 디스크 스냅샷 파일 이름
+
+    완료 업무 보관(cold) 파티션은 종료 연도별로 따로 두고, 활성 데이터(read 등)와 별개로 다룬다.
+    archive_years()       : 보관 파티션이 있는 연도 목록
+    read_archive(year)    : 해당 연도 보관분
+    write_archive(year, sheet_df) : 해당 연도 파티션에 행 추가 (같은 ID 는 덮어씀)
+    archive_max_id()      : 보관분의 최대 _original_id (없으면 -1) — 새 ID 가 보관된 ID 를 다시 쓰지 않게 하는 하한
+    """
+    name = "base"
+    snapshot_name = "base"
+
+    def read(self):
+        raise NotImplementedError
+
+    def get_rows(self, ids):
+        df = self.read()
+        return df[pd.to_numeric(df["_original_id"], errors='coerce').isin(list(ids))].reset_index(drop=True)
+
+    def write_changes(self, sheet_df, change_set):
+        raise NotImplementedError
+
+    def replace_all(self, sheet_df):
+        raise NotImplementedError
+
+    def archive_years(self):
+        return []
+
+    def read_archive(self, year):
+        raise NotImplementedError
+
+    def write_archive(self, year, sheet_df):
+        raise NotImplementedError
+
+    def archive_max_id(self):
+        ids = pd.to_numeric(read_archives(self)["_original_id"], errors='coerce').dropna()
+        return int(ids.max()) if len(ids) else -1
+
+ARCHIVE_READ_WORKERS = 4  # 보관 파티션을 동시에 읽는 스레드 수
+
+def read_archives(backend, years=None):
+    """보관 파티션(기본: 전부)을 스레드 풀로 동시에 읽어 하나로 합친다. 보관분이 없으면 빈 프레임."""
+    years = backend.archive_years() if years is None else list(years)
+    if not years: return pd.DataFrame(columns=SHEET_COLUMNS)
+    with ThreadPoolExecutor(max_workers=min(ARCHIVE_READ_WORKERS, len(years)), thread_name_prefix="archive-read") as pool:
+        frames = list(pool.map(backend.read_archive, years))
+    return pd.concat(frames, ignore_index=True)
+
+# -----------------------------------------------------------------------------
+# 구글 시트
+# -----------------------------------------------------------------------------
+class GSheetsBackend(StorageBackend):
+    """st-gsheets-connection 기반 저장소. 서비스 계정으로 접근하면 바뀐 행만 기록하고, 그렇지 않으면 전체를 덮어쓴다."""
+    name = "gsheets"
+
+    def __init__(self, conn=None, worksheet="Sheet1", connect=None):
+        """conn: 연결 객체, 또는 connect: 연결 객체를 만드는 함수 (처음 읽거나 쓸 때 한 번 호출)."""
+        self._conn = conn
+        self._connect = connect
+        self._lock = threading.Lock()
+        self.worksheet = worksheet
+        self.snapshot_name = worksheet  # 연결 없이 정해지므로 디스크 스냅샷은 연결 전에도 쓸 수 있다
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None: self._conn = self._connect()
+        return self._conn
+
+    def archive_name(self, year):
+        return f"{self.worksheet}_archive_{year}"
+
+    def read(self):
+        return self.conn.read(worksheet=self.worksheet, ttl=0)
+
+    def write_changes(self, sheet_df, change_set):
+        if sheet_df["_original_id"].duplicated().any() or not self._write_delta(sheet_df, change_set):
+            self.replace_all(sheet_df)
+
+    def replace_all(self, sheet_df):
+        self.conn.update(worksheet=self.worksheet, data=sheet_df)
+
+    def archive_years(self):
+        """'<워크시트>_archive_<연도>' 워크시트의 연도들. 워크시트 목록을 볼 수 없는 공개 시트 접근이면 빈 목록."""
+        client = getattr(self.conn, "client", None)
+        if not hasattr(client, "_open_spreadsheet"): return []
+        pattern = re.compile(re.escape(self.archive_name("")) + r"(\d{4})")
+        titles = [ws.title for ws in client._open_spreadsheet().worksheets()]
+        return sorted(int(m.group(1)) for m in map(pattern.fullmatch, titles) if m)
+
+    def read_archive(self, year):
+        return self.conn.read(worksheet=self.archive_name(year), ttl=0)
+
+    def archive_max_id(self):
+        # 보관 워크시트 전체 대신 ID 열만 읽는다
+        client = getattr(self.conn, "client", None)
+        if not hasattr(client, "_select_worksheet"): return super().archive_max_id()
+        ids = []
+        for year in self.archive_years():
+            ws = client._select_worksheet(worksheet=self.archive_name(year))
+            header = ws.row_values(1)
+            if "_original_id" in header: ids += ws.col_values(header.index("_original_id") + 1)[1:]
+        ids = pd.to_numeric(pd.Series(ids, dtype=object), errors='coerce').dropna()
+        return int(ids.max()) if len(ids) else -1
+
+    def write_archive(self, year, sheet_df):
+        # 보관은 가끔 일어나므로 해당 연도 워크시트를 통째로 다시 쓴다
+        if year not in self.archive_years():
+            self.conn.create(worksheet=self.archive_name(year), data=sheet_df)
+            return
+        existing = self.read_archive(year)
+        existing = existing[~pd.to_numeric(existing["_original_id"], errors='coerce').isin(sheet_df["_original_id"])]
+        self.conn.update(worksheet=self.archive_name(year), data=pd.concat([existing, sheet_df], ignore_index=True))
+
+    def _write_delta(self, sheet_df, change_set):
+        """변경된 행만 시트에 반영 (수정: 범위 일괄 갱신, 삭제: 행 삭제 일괄 요청, 추가: 끝에 append).
+        행 위치는 저장 직전에 시트의 ID 열을 다시 읽어 찾으므로 다른 사용자의 동시 저장과 섞여도 어긋나지 않는다.
+        행 단위 갱신을 할 수 없는 경우(공개 시트 접근, ID 열이 없는 기존 시트 등) False.
+        시트에 직접 입력해 ID 가 비었거나 숫자가 아닌 행이 있거나, 수정/삭제할 ID 가 시트에 없으면 역시 False —
+        전체 덮어쓰기로 메모리에서 매긴 ID 를 시트에 기록해 이후 저장이 같은 행을 찾도록 한다."""
+        client = getattr(self.conn, "client", None)
+        if not hasattr(client, "_select_worksheet"): return False
+        if not any(change_set.values()): return True
+        ws = client._select_worksheet(worksheet=self.worksheet)
+        if ws.row_values(1) != SHEET_COLUMNS: return False
+
+        ids = pd.to_numeric(pd.Series(ws.col_values(len(SHEET_COLUMNS))[1:], dtype=object), errors='coerce')
+        if ids.isna().any(): return False
+        row_of = {int(row_id): i + 2 for i, row_id in enumerate(ids)}
+        if any(i not in row_of for i in change_set["modified"] + change_set["deleted"]): return False
+
+        rows = sheet_df.set_index("_original_id", drop=False).astype(object)
+        last_col = chr(ord("A") + len(SHEET_COLUMNS) - 1)
+        updates = []
+        for row_id in change_set["modified"]:
+            r = row_of[row_id]
+            updates.append({"range": f"A{r}:{last_col}{r}", "values": [rows.loc[row_id].tolist()]})
+        appends = [rows.loc[row_id].tolist() for row_id in change_set["added"]]
+        deletes = sorted((row_of[i] for i in change_set["deleted"]), reverse=True)
+
+        if updates:
+            ws.batch_update(updates, value_input_option="USER_ENTERED")
+        if deletes:
+            ws.spreadsheet.batch_update({"requests": [
+                {"deleteDimension": {"range": {"sheetId": ws.id, "dimension": "ROWS", "startIndex": r - 1, "endIndex": r}}}
+                for r in deletes
+            ]})
+        if appends:
+            ws.append_rows(appends, value_input_option="USER_ENTERED")
+        return True
+
+# -----------------------------------------------------------------------------
+# 로컬 SQLite
+# -----------------------------------------------------------------------------
+SQLITE_TYPES = {"작업기간": "INTEGER", "진행률": "INTEGER", "_original_id": "INTEGER PRIMARY KEY"}
+
+class SQLiteBackend(StorageBackend):
+    """로컬 SQLite 저장소. _original_id 가 기본 키(인덱스)라 ID 조회가 빠르고,
+    한 번의 저장은 하나의 트랜잭션(upsert + delete)으로 반영되어 중간 상태가 남지 않는다."""
+    name = "sqlite"
+
+    def __init__(self, path, table="tasks"):
+        self.path = str(path)
+        self.table = table
+        self.snapshot_name = f"sqlite_{table}"
+        self._lock = threading.Lock()  # 같은 프로세스의 쓰기는 직렬화 (다른 프로세스와는 SQLite 잠금으로)
+        if self.path != ":memory:": Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._memory = sqlite3.connect(self.path, check_same_thread=False) if self.path == ":memory:" else None
+        with self._connect() as conn:
+            if self.path != ":memory:": conn.execute("PRAGMA journal_mode=WAL")
+            self._create_table(conn, self.table)
+
+    @staticmethod
+    def _create_table(conn, table):
+        columns = ", ".join(f'"{col}" {SQLITE_TYPES.get(col, "TEXT")}' for col in SHEET_COLUMNS)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+        # 이전 버전에서 만든 테이블에 새 컬럼(예: 선행업무)이 없으면 추가
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+        for col in SHEET_COLUMNS:
+            if col not in existing: conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{col}" TEXT NOT NULL DEFAULT \'\'')
+
+    def archive_name(self, year):
+        return f"{self.table}_archive_{year}"
+
+    @contextmanager
+    def _connect(self):
+        """with 블록 하나가 하나의 트랜잭션 (예외 시 롤백). 파일 DB 는 작업마다 연결을 새로 열고 닫는다."""
+        conn = self._memory or sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            if conn is not self._memory: conn.close()
+
+    def _select(self, where="", params=(), table=None):
+        cols = ", ".join(f'"{col}"' for col in SHEET_COLUMNS)
+        with self._connect() as conn:
+            return pd.read_sql_query(f'SELECT {cols} FROM "{table or self.table}" {where} ORDER BY rowid', conn, params=params)
+
+    def read(self):
+        return self._select()
+
+    def get_rows(self, ids):
+        ids = [int(i) for i in ids]
+        if not ids: return self._select("WHERE 0")
+        return self._select(f'WHERE "_original_id" IN ({", ".join("?" * len(ids))})', ids)
+
+    def _records(self, sheet_df, ids):
+        rows = sheet_df[sheet_df["_original_id"].isin(ids)][SHEET_COLUMNS]
+        return [tuple(int(v) if col in SQLITE_TYPES else str(v) for col, v in zip(SHEET_COLUMNS, rec))
+                for rec in rows.itertuples(index=False)]
+
+    def _upsert(self, conn, table, records):
+        cols = ", ".join(f'"{col}"' for col in SHEET_COLUMNS)
+        updates = ", ".join(f'"{col}" = excluded."{col}"' for col in SHEET_COLUMNS if col != "_original_id")
+        conn.executemany(
+            f'INSERT INTO "{table}" ({cols}) VALUES ({", ".join("?" * len(SHEET_COLUMNS))}) '
+            f'ON CONFLICT("_original_id") DO UPDATE SET {updates}', records)
+
+    def write_changes(self, sheet_df, change_set):
+        upserts = self._records(sheet_df, list(change_set["added"]) + list(change_set["modified"]))
+        deletes = [(int(i),) for i in change_set["deleted"]]
+        if not upserts and not deletes: return
+        with self._lock, self._connect() as conn:
+            if upserts:
+                self._upsert(conn, self.table, upserts)
+            if deletes:
+                conn.executemany(f'DELETE FROM "{self.table}" WHERE "_original_id" = ?', deletes)
+
+    def replace_all(self, sheet_df):
+        records = self._records(sheet_df.drop_duplicates("_original_id", keep="last"), sheet_df["_original_id"])
+        with self._lock, self._connect() as conn:
+            conn.execute(f'DELETE FROM "{self.table}"')
+            cols = ", ".join(f'"{col}"' for col in SHEET_COLUMNS)
+            conn.executemany(f'INSERT INTO "{self.table}" ({cols}) VALUES ({", ".join("?" * len(SHEET_COLUMNS))})', records)
+
+    def archive_years(self):
+        prefix = self.archive_name("")
+        with self._connect() as conn:
+            names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        return sorted(int(n[len(prefix):]) for n in names if n.startswith(prefix) and n[len(prefix):].isdigit())
+
+    def read_archive(self, year):
+        return self._select(table=self.archive_name(year))
+
+    def archive_max_id(self):
+        years = self.archive_years()
+        if not years: return -1
+        sql = " UNION ALL ".join(f'SELECT MAX("_original_id") FROM "{self.archive_name(y)}"' for y in years)
+        with self._connect() as conn:
+            values = [row[0] for row in conn.execute(sql) if row[0] is not None]
+        return max(values, default=-1)
+
+    def write_archive(self, year, sheet_df):
+        records = self._records(sheet_df, sheet_df["_original_id"])
+        with self._lock, self._connect() as conn:
+            self._create_table(conn, self.archive_name(year))
+            self._upsert(conn, self.archive_name(year), records)
+
+# -----------------------------------------------------------------------------
+# 지연 기록 (write-behind)
+# -----------------------------------------------------------------------------
+FLUSH_INTERVAL = 1.0   # 첫 변경 후 이만큼 기다렸다가 그사이 들어온 변경과 함께 기록 (초)
+RETRY_BASE = 1.0       # 기록 실패 시 재시도 대기 (초, 실패할 때마다 2배)
+RETRY_MAX = 60.0
+
+class WriteBehindQueue:
+    """저장소 기록을 백그라운드 스레드로 넘기는 대기열.
+
+    변경은 _original_id 별 마지막 동작(add / upsert / delete)만 남도록 합쳐지고 (기록 전에 추가했다 지운 행은 빠짐), 행 내용은 가장 최근에 받은
+    전체 프레임에서 꺼내 한 번의 write_changes 로 기록한다. 실패하면 그 묶음을 대기열에 되돌리고
+    지수 백오프로 재시도한다. 프로세스 종료 시 남은 변경을 한 번 더 기록한다.
+    """
+
+    def __init__(self, backend, on_flushed=None, interval=FLUSH_INTERVAL, prepare=None, on_timing=None):
+        self.backend = backend
+        self.on_flushed = on_flushed  # 대기열이 비었을 때 (마지막으로 기록한 시트 프레임, 그 프레임의 tag) 를 받는 함수
+        self.prepare = prepare  # 받은 프레임을 시트 프레임으로 바꾸는 함수 — 저장하는 쪽 대신 기록 스레드에서 실행
+        self.on_timing = on_timing  # 기록에 걸린 시간을 받는 함수 (단계 이름, ms)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = {}
+        self._latest = None
+        self._tag = None
+        self._in_flight = 0
+        self._thread = None
+        self.generation = 0  # 대기열에 변경이 들어오거나 기록될 때마다 증가 (그사이 읽은 저장소 내용이 최신인지 판단용)
+        self.status = {"last_flush_at": None, "last_flush_rows": 0, "last_flush_ms": None, "last_error": None, "failures": 0, "retry_at": None}
+        atexit.register(self.flush)
+
+    @property
+    def depth(self):
+        """기록 대기 + 기록 중인 행 수."""
+        return len(self._pending) + self._in_flight
+
+    def enqueue(self, sheet_df, change_set, tag=None):
+        """sheet_df(변경이 반영된 전체 프레임, prepare 가 있으면 변환 전)의 change_set 행을 기록 대기열에 넣는다.
+        tag 는 이 프레임까지 기록되어 대기열이 비었을 때 on_flushed 에 함께 넘어간다."""
+        with self._lock:
+            for row_id in change_set["added"]:
+                self._pending[int(row_id)] = "add"
+            for row_id in change_set["modified"]:
+                if self._pending.get(int(row_id)) != "add": self._pending[int(row_id)] = "upsert"
+            for row_id in change_set["deleted"]:
+                if self._pending.get(int(row_id)) == "add": del self._pending[int(row_id)]
+                else: self._pending[int(row_id)] = "delete"
+            self._latest, self._tag = sheet_df, tag
+            self.generation += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def flush(self):
+        """대기 중인 변경을 지금 기록. 실패하면 변경을 대기열에 되돌리고 False."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                latest, tag, self._in_flight = self._latest, self._tag, len(batch)
+            if not batch: return True
+            change_set = {
+                "added": [i for i, op in batch.items() if op == "add"],
+                "modified": [i for i, op in batch.items() if op == "upsert"],
+                "deleted": [i for i, op in batch.items() if op == "delete"],
+            }
+            try:
+                if self.prepare: latest = self.prepare(latest)
+                t0 = time.perf_counter()
+                self.backend.write_changes(latest, change_set)
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+            except Exception as e:
+                with self._lock:
+                    for row_id, op in batch.items(): self._pending.setdefault(row_id, op)  # 그사이 들어온 변경이 우선
+                    self._in_flight = 0
+                self.status.update(last_error=str(e), failures=self.status["failures"] + 1)
+                return False
+            with self._lock:
+                self._in_flight = 0
+                self.generation += 1
+                drained = not self._pending and self._tag is tag
+            self.status.update(last_flush_at=time.time(), last_flush_rows=len(batch), last_flush_ms=elapsed_ms, last_error=None, failures=0, retry_at=None)
+            if self.on_timing: self.on_timing("save.flush", elapsed_ms)
+            if drained and self.on_flushed: self.on_flushed(latest, tag)
+            return True
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            self._wake.clear()
+            if not self.flush():
+                delay = min(RETRY_MAX, RETRY_BASE * 2 ** (self.status["failures"] - 1))
+                self.status["retry_at"] = time.time() + delay
+                time.sleep(delay)
+                self._wake.set()
+
+# -----------------------------------------------------------------------------
+# 설정
+# -----------------------------------------------------------------------------
+DEFAULT_SQLITE_PATH = Path(__file__).parent / "schedule.db"
+
+def storage_config(secrets=None):
+    """저장소 설정 {"backend", "path", "worksheet"}. 환경변수 > secrets 의 [storage] > 기본값 순."""
+    config = {"backend": "gsheets", "path": str(DEFAULT_SQLITE_PATH), "worksheet": "Sheet1"}
+    config.update({k: v for k, v in dict(secrets or {}).items() if k in config})
+    if os.environ.get("SCHEDULE_STORAGE"): config["backend"] = os.environ["SCHEDULE_STORAGE"]
+    if os.environ.get("SCHEDULE_SQLITE_PATH"): config["path"] = os.environ["SCHEDULE_SQLITE_PATH"]
+    return config
+
+def make_backend(config, gsheets_conn=None):
+    """설정에 맞는 저장소. gsheets 는 연결 객체를 만드는 함수(gsheets_conn)를 받아 필요할 때만 연결한다."""
+    if config["backend"] == "sqlite":
+        return SQLiteBackend(config["path"])
+    if config["backend"] == "gsheets":
+        return GSheetsBackend(worksheet=config["worksheet"], connect=gsheets_conn)
+    raise ValueError(f"알 수 없는 저장소: {config['backend']}")